@@ -1,20 +1,32 @@
 # gyems_rs485.py
 from __future__ import annotations
 
+import os
 import struct
+import threading
 import time
 from dataclasses import dataclass
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, Sequence
 
 import serial
 import serial.tools.list_ports
 
+from serial_common.ftdi import set_ftdi_latency_timer
+
+
+# Vorkompilierte Formate fuer die Payloads (statt Format-String-Lookup pro Aufruf)
+_STATUS_STRUCT = struct.Struct("<bhhH")   # temp, iq, speed, encoder
+_I8_STRUCT = struct.Struct("b")
+_U16_STRUCT = struct.Struct("<H")
+_SPEED_STRUCT = struct.Struct("<i")       # 0.01 °/s
+_ABS_STRUCT = struct.Struct("<q")         # 0.01 °
+
 
 class GyemsProtocolError(Exception):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GyemsStatus:
     temperature_C: int
     torque_current: int
@@ -22,7 +34,7 @@ class GyemsStatus:
     encoder_pos: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GyemsModelInfo:
     driver: str
     motor: str
@@ -51,6 +63,15 @@ class GyemsRmdRs485:
     """
 
     HEADER_BYTE = 0x3E
+    SPEED_FRAME_LEN = 10     # 5 Header + 4 Daten (int32) + 1 Daten-Checksumme
+    SPEED_PAYLOAD_OFF = 5
+
+    # Windows-Treiberpuffer (pyserial-Default 4096 B): 16x RX-Reserve, damit bei
+    # Scheduler-Jitter waehrend langer Dauertests keine Antwortbytes verloren gehen
+    WIN_RX_BUFFER_SIZE = 65536
+    WIN_TX_BUFFER_SIZE = 4096
+    # 0x12 Modellinfo, 0x80 Shutdown, 0x94 Winkel, 0x9A/0x9B Fehler lesen/loeschen, 0x9C Status
+    CONST_FRAME_CMDS = (0x12, 0x80, 0x94, 0x9A, 0x9B, 0x9C)
 
     def __init__(
         self,
@@ -59,21 +80,65 @@ class GyemsRmdRs485:
         baudrate: int = 115200,
         timeout: float = 0.2,
         inter_cmd_delay: float = 0.02,
+        strict_flush: bool = False,
     ):
         self.port = port
         self.motor_id = motor_id & 0xFF
         self.baudrate = baudrate
         self.timeout = float(timeout)
+        # Mindestabstand vor dem naechsten Request, nur noetig wenn der Motor noch nicht
+        # geantwortet hat (nach TX-only oder Timeout); nach einer Antwort ist er bereit.
         self.inter_cmd_delay = float(inter_cmd_delay)
+        # True: nach jedem write ser.flush() (tcdrain/FlushFileBuffers), nur als Fallback
+        # falls ein Adapter ohne flush Frames verschluckt; kostet ~Frame-Sendezeit pro write.
+        self.strict_flush = bool(strict_flush)
         self.ser: Optional[serial.Serial] = None
+        # Request/Antwort-Paare (_txrx) sind zwischen Threads atomar; TX-only wartet bewusst
+        # nicht auf ein laufendes Request (Regelkreis haengt nie an einem Timeout), sondern
+        # merkt sich den Sollwert und _exchange sendet ihn, sobald die Antwort gelesen ist.
+        self._txrx_lock = threading.RLock()
+        self._pending_speed_dps: Optional[float] = None   # zurueckgestellter TX-only Sollwert
+        self._model_info_cache: Optional[GyemsModelInfo] = None   # statisch pro Verbindung
+        self._rx_buf = bytearray()       # bereits gelesene, noch nicht geparste RX-Bytes
+        self._quiet_until = 0.0          # time.monotonic()
+
+        # Header-Checksumme = (0x3E + CMD + ID + LEN) & 0xFF; 0x3E + ID ist pro Instanz konstant
+        self._head_sum = self.HEADER_BYTE + self.motor_id
+
+        # Vorgebauter 0xA2-Frame fuer den TX-only Fast-Path: nur Payload + Daten-Checksumme
+        # werden pro Aufruf in-place ueberschrieben (keine bytes-Allokationen pro Tick).
+        self._speed_tx_buf = bytearray(self._build_frame(0xA2, b"\x00\x00\x00\x00"))
+        # schuetzt Patch + write des geteilten Puffers (Regel-/TX-Thread und stop() aus anderen
+        # Threads), sonst ginge ein halb gepatchter Frame mit falscher Checksumme raus
+        self._speed_tx_lock = threading.Lock()
+        # Payload-lose Requests haengen nur von motor_id ab -> einmal bauen statt pro Aufruf
+        self._const_frames: Dict[int, bytes] = {
+            cmd: self._build_frame(cmd) for cmd in self.CONST_FRAME_CMDS
+        }
+        self._write = None
 
     # ---------- utilities ----------
     @staticmethod
     def list_ports() -> list[str]:
         return [p.device for p in serial.tools.list_ports.comports()]
 
+    @staticmethod
+    def min_timeout_s(baudrate: int, rx_bytes: int, margin: float = 3.0, floor_s: float = 0.005) -> float:
+        """
+        Kleinster sinnvoller Read-Timeout für eine Antwort mit rx_bytes Bytes:
+        Übertragungszeit (10 Bit/Byte) * margin, mindestens floor_s.
+        """
+        byte_time = 10.0 / float(baudrate)
+        return max(float(floor_s), byte_time * int(rx_bytes) * float(margin))
+
+    @staticmethod
+    def set_ftdi_latency_timer(port: str, latency_ms: int = 1) -> bool:
+        """FTDI latency_timer setzen (nur Linux), siehe serial_common.ftdi. Returns: True wenn gesetzt."""
+        return set_ftdi_latency_timer(port, latency_ms)
+
     @staticmethod
     def _chk(data: bytes) -> int:
+        # sum() ueber bytes laeuft komplett in C; memoryview/zlib waeren fuer 4..60 Byte langsamer
         return sum(data) & 0xFF
 
     def is_connected(self) -> bool:
@@ -90,135 +155,271 @@ class GyemsRmdRs485:
             parity="N",
             stopbits=1,
         )
+        # set_buffer_size gibt es nur in der Windows-Implementierung von pyserial
+        if hasattr(self.ser, "set_buffer_size"):
+            try:
+                self.ser.set_buffer_size(rx_size=self.WIN_RX_BUFFER_SIZE, tx_size=self.WIN_TX_BUFFER_SIZE)
+            except Exception:
+                pass
+        self._write = self._select_writer()
+        self._model_info_cache = None
         # Clear any garbage
         try:
-            self.ser.reset_input_buffer()
+            self.reset_input_buffer()
             self.ser.reset_output_buffer()
         except Exception:
             pass
 
+    def _select_writer(self):
+        """
+        POSIX: direkt os.write auf den TTY-fd (pyserial-write macht fuer 5..20 Byte Frames
+        nur Overhead); Windows/sonst: ser.write. Ein flush() ist in beiden Faellen nicht
+        noetig: POSIX-write landet sofort im Kernel-TX-Puffer, pyserial auf Windows wartet
+        im write selbst auf den Abschluss. strict_flush=True haengt ihn trotzdem an.
+        """
+        assert self.ser is not None
+        if self.strict_flush:
+            ser = self.ser
+
+            def write_flush(data) -> int:
+                n = ser.write(data)
+                ser.flush()
+                return n
+
+            return write_flush
+        fd = getattr(self.ser, "fd", None)
+        if os.name != "posix" or not isinstance(fd, int):
+            return self.ser.write
+        ser_write = self.ser.write
+        os_write = os.write
+
+        def write_fd(data) -> int:
+            # pyserial oeffnet den fd mit O_NONBLOCK: bei vollem Kernel-TX-Puffer kommt
+            # BlockingIOError (bzw. ein kurzer Schreibzugriff) -> Rest ueber pyserial
+            # (select + retry)
+            try:
+                n = os_write(fd, data)
+            except (BlockingIOError, InterruptedError):
+                n = 0
+            if n < len(data):
+                n += ser_write(memoryview(data)[n:])
+            return n
+
+        return write_fd
+
     def close(self) -> None:
+        self._write = None
         if self.ser is not None:
             try:
                 self.ser.close()
             finally:
                 self.ser = None
 
+    def reset_input_buffer(self) -> None:
+        """Verwirft den Treiber-RX-Puffer und den RX-Puffer des Ports."""
+        # unter dem Lock: sonst verwirft ein anderer Thread Bytes einer laufenden Antwort
+        with self._txrx_lock:
+            self._rx_buf.clear()
+            if self.ser is not None:
+                self.ser.reset_input_buffer()
+
     # ---------- frame I/O ----------
     def _build_frame(self, cmd: int, data: bytes = b"") -> bytes:
-        cmd &= 0xFF
         data_len = len(data)
-        header = bytes([self.HEADER_BYTE, cmd, self.motor_id, data_len])
-        head_chk = self._chk(header)
-        frame = header + bytes([head_chk])
+        frame = bytearray(5 + data_len + 1 if data_len else 5)
+        frame[0] = self.HEADER_BYTE
+        frame[1] = cmd & 0xFF
+        frame[2] = self.motor_id
+        frame[3] = data_len
+        frame[4] = (self._head_sum + frame[1] + data_len) & 0xFF
         if data_len:
-            frame += data + bytes([self._chk(data)])
-        return frame
+            frame[5:5 + data_len] = data
+            frame[5 + data_len] = self._chk(data)
+        return bytes(frame)
 
-    def _read_exact(self, n: int) -> bytes:
-        assert self.ser is not None
-        buf = bytearray()
-        deadline = time.time() + self.timeout
-        while len(buf) < n and time.time() < deadline:
-            chunk = self.ser.read(n - len(buf))
-            if chunk:
-                buf.extend(chunk)
-            else:
-                time.sleep(0.001)
-        return bytes(buf)
+    def _fill(self, n: int) -> bool:
+        """
+        Sorgt dafuer, dass mindestens n Bytes in _rx_buf liegen. Was bereits ansteht
+        (in_waiting), wird im selben read mitgenommen; sonst blockiert read() bis
+        die fehlenden Bytes da sind oder self.timeout abgelaufen ist.
+        Nur mit offener Verbindung aufrufen (_exchange prueft das).
+        """
+        buf = self._rx_buf
+        missing = n - len(buf)
+        if missing > 0:
+            ser = self.ser
+            buf += ser.read(max(missing, ser.in_waiting))
+        return len(buf) >= n
 
     def _read_frame(self) -> Tuple[int, int, bytes]:
         """
         Read one response frame and return (cmd, motor_id, data).
         """
-        assert self.ser is not None
-
-        # Sync to 0x3E (protect against noise/partial bytes)
-        deadline = time.time() + self.timeout
-        while True:
-            b = self.ser.read(1)
-            if b == b"":
-                if time.time() >= deadline:
-                    raise TimeoutError("Timeout waiting for frame header (0x3E)")
-                continue
-            if b[0] == self.HEADER_BYTE:
-                break
-
-        # Read remaining fixed header fields: CMD, ID, LEN, CHK_HEAD
-        rest = self._read_exact(4)
-        if len(rest) < 4:
+        buf = self._rx_buf
+        fill = self._fill
+        header_byte = self.HEADER_BYTE
+
+        # Fester Header [0x3E, CMD, ID, LEN, CHK_HEAD]; meist ist die Antwort schon komplett da
+        fill(5)
+        if not buf:
+            raise TimeoutError("Timeout waiting for frame header (0x3E)")
+
+        start = buf.find(header_byte)
+        if start < 0:
+            # Sync to 0x3E (protect against noise/partial bytes), gepuffert statt read(1)-Schleife
+            buf.clear()
+            skipped = self.ser.read_until(bytes([header_byte]), size=256)
+            if not skipped or skipped[-1] != header_byte:
+                raise TimeoutError("Timeout waiting for frame header (0x3E)")
+            buf.append(header_byte)
+        elif start > 0:
+            del buf[:start]
+
+        if not fill(5):
             raise TimeoutError("Timeout reading header fields")
-        cmd, mid, length, chk_head = rest[0], rest[1], rest[2], rest[3]
+        cmd, mid, length, chk_head = buf[1], buf[2], buf[3], buf[4]
+        del buf[:5]
 
-        header = bytes([self.HEADER_BYTE, cmd, mid, length])
-        if self._chk(header) != chk_head:
+        expected_head = (header_byte + cmd + mid + length) & 0xFF
+        if expected_head != chk_head:
             raise GyemsProtocolError(
-                f"Header checksum mismatch (got 0x{chk_head:02X}, expected 0x{self._chk(header):02X})"
+                f"Header checksum mismatch (got 0x{chk_head:02X}, expected 0x{expected_head:02X})"
             )
 
         data = b""
         if length > 0:
-            payload = self._read_exact(length + 1)  # data + chk_data
-            if len(payload) < length + 1:
+            # data + chk_data direkt aus _rx_buf: eine Kopie (bytes) statt Zwischenpuffer + Slice
+            if not fill(length + 1):
+                buf.clear()
                 raise TimeoutError("Timeout reading payload")
-            data = payload[:length]
-            chk_data = payload[length]
-            if self._chk(data) != chk_data:
+            with memoryview(buf) as mv:
+                data = bytes(mv[:length])
+            chk_data = buf[length]
+            del buf[:length + 1]
+            expected_data = self._chk(data)
+            if expected_data != chk_data:
                 raise GyemsProtocolError(
-                    f"Data checksum mismatch (got 0x{chk_data:02X}, expected 0x{self._chk(data):02X})"
+                    f"Data checksum mismatch (got 0x{chk_data:02X}, expected 0x{expected_data:02X})"
                 )
 
         return cmd, mid, data
 
-    def _txrx(self, cmd: int, data: bytes = b"") -> Tuple[int, int, bytes]:
+    def _exchange(self, frame: bytes, n_replies: int) -> List[Tuple[int, int, bytes]]:
         """
-        Send command and read one response frame.
+        frame (ein oder mehrere Requests) in einem write senden, dann n_replies Antworten lesen.
         """
         if not self.is_connected():
             raise RuntimeError("Not connected")
 
-        assert self.ser is not None
-        frame = self._build_frame(cmd, data)
+        self._txrx_lock.acquire()
+        try:
+            wait = self._quiet_until - time.monotonic()
+            if wait > 0.0:
+                time.sleep(wait)
+
+            self._write(frame)
+
+            # kein fixes Sleep: read() blockiert (OS-seitig) bis die Antwort da ist
+            try:
+                replies = [self._read_frame() for _ in range(n_replies)]
+            except Exception:
+                self._quiet_until = time.monotonic() + self.inter_cmd_delay
+                raise
 
+            self._quiet_until = 0.0
+            return replies
+        finally:
+            self._release_txrx()
 
-        self.ser.write(frame)
-        self.ser.flush()
-        time.sleep(self.inter_cmd_delay)
+    def _release_txrx(self) -> None:
+        """
+        _txrx_lock freigeben; einen waehrenddessen zurueckgestellten TX-only Sollwert vorher
+        senden. Kommt er erst nach der Freigabe an, holt ein erneuter try-acquire ihn nach.
+        """
+        while True:
+            speed = self._pending_speed_dps
+            if speed is not None:
+                self._pending_speed_dps = None
+                try:
+                    self._send_speed_frame(speed)
+                except Exception:
+                    pass  # Portfehler meldet der naechste TX-only/Request selbst
+            self._txrx_lock.release()
+            if self._pending_speed_dps is None or not self._txrx_lock.acquire(blocking=False):
+                return
+
+    def _txrx(self, cmd: int, data: bytes = b"") -> Tuple[int, int, bytes]:
+        """
+        Send command and read one response frame.
+        """
+        frame = self._const_frames.get(cmd) if not data else None
+        return self._exchange(frame or self._build_frame(cmd, data), 1)[0]
+
+    def _txrx_many(self, requests: Sequence[Tuple[int, bytes]]) -> List[Tuple[int, int, bytes]]:
+        """
+        Pipelined: alle Requests back-to-back in einem write, danach die Antworten in
+        Reihenfolge lesen (eine Round-Trip-Wartezeit statt len(requests)).
+        Nur verwenden, wenn der RS-485-Adapter/Motor Antworten verträgt, während noch
+        Requests auf dem Bus sind; sonst einzelne _txrx-Aufrufe.
+        """
+        const = self._const_frames
+        frame = b"".join(
+            (None if data else const.get(cmd)) or self._build_frame(cmd, data) for cmd, data in requests
+        )
+        replies = self._exchange(frame, len(requests))
+        for (cmd, _), (rcmd, _, _) in zip(requests, replies):
+            if rcmd != (cmd & 0xFF):
+                raise GyemsProtocolError(f"Unexpected response 0x{rcmd:02X} (expected 0x{cmd & 0xFF:02X})")
+        return replies
 
-        return self._read_frame()
+    # ---------- payload decode ----------
+    @staticmethod
+    def _parse_status(data: bytes) -> GyemsStatus:
+        if len(data) < 7:
+            raise GyemsProtocolError(f"Status payload too short: {len(data)} bytes")
+        temp, iq, spd, enc = _STATUS_STRUCT.unpack_from(data, 0)
+        return GyemsStatus(temperature_C=temp, torque_current=iq, speed_raw=spd, encoder_pos=enc)
+
+    @staticmethod
+    def _parse_angle_deg(data: bytes) -> float:
+        if len(data) < 2:
+            raise GyemsProtocolError(f"Angle payload too short: {len(data)} bytes")
+        return _U16_STRUCT.unpack_from(data, 0)[0] * 0.01
 
     # ---------- high-level commands ----------
-    def read_model_info(self) -> GyemsModelInfo:
+    def read_model_info(self, force: bool = False) -> GyemsModelInfo:
+        """
+        Modell-/Versionsinfo (0x12). Die Daten sind statisch, daher wird das Ergebnis pro
+        Verbindung gecacht; force=True liest trotzdem neu vom Motor.
+        """
+        if self._model_info_cache is not None and not force:
+            return self._model_info_cache
         cmd, mid, data = self._txrx(0x12)
         # data length is typically 58 (as you saw), but we parse defensively
-        driver = data[0:20].decode(errors="ignore").strip("\x00").strip() if len(data) >= 20 else ""
-        motor = data[20:40].decode(errors="ignore").strip("\x00").strip() if len(data) >= 40 else ""
+        driver = data[0:20].partition(b"\x00")[0].decode("ascii", "ignore").strip() if len(data) >= 20 else ""
+        motor = data[20:40].partition(b"\x00")[0].decode("ascii", "ignore").strip() if len(data) >= 40 else ""
         hw_version = None
         fw_version = None
         if len(data) >= 42:
             hw_version = data[40] / 10.0
             fw_version = data[41] / 10.0
-        return GyemsModelInfo(driver=driver, motor=motor, hw_version=hw_version, fw_version=fw_version, raw_data=data)
+        info = GyemsModelInfo(driver=driver, motor=motor, hw_version=hw_version, fw_version=fw_version, raw_data=data)
+        self._model_info_cache = info
+        return info
 
     def read_status(self, retries: int = 2) -> GyemsStatus:
         last_exc = None
         for attempt in range(retries + 1):
             try:
                 cmd, mid, data = self._txrx(0x9C)
-                if len(data) < 7:
-                    raise GyemsProtocolError(f"Status payload too short: {len(data)} bytes")
-                temp = struct.unpack("b", data[0:1])[0]
-                iq = struct.unpack("<h", data[1:3])[0]
-                spd = struct.unpack("<h", data[3:5])[0]
-                enc = struct.unpack("<H", data[5:7])[0]
-                return GyemsStatus(temperature_C=temp, torque_current=iq, speed_raw=spd, encoder_pos=enc)
+                return self._parse_status(data)
 
             except TimeoutError as e:
                 last_exc = e
                 # nur bei Fehler: resync/flush
                 try:
                     if self.ser:
-                        self.ser.reset_input_buffer()
+                        self.reset_input_buffer()
                 except Exception:
                     pass
                 time.sleep(0.02)  # kurzer Abstand vor Retry
@@ -233,10 +434,10 @@ class GyemsRmdRs485:
         cmd, mid, data = self._txrx(0x9A)
         out: Dict[str, Any] = {"raw_data": data}
         if len(data) >= 1:
-            out["temperature_C"] = struct.unpack("b", data[0:1])[0]
+            out["temperature_C"] = _I8_STRUCT.unpack_from(data, 0)[0]
         # Some firmwares encode voltage in bytes 2..3 (uint16, 0.1V/LSB). Best-effort:
         if len(data) >= 4:
-            out["voltage_raw_u16"] = struct.unpack("<H", data[2:4])[0]
+            out["voltage_raw_u16"] = _U16_STRUCT.unpack_from(data, 2)[0]
             out["voltage_V_guess"] = out["voltage_raw_u16"] * 0.1
         # Often a flags byte exists; we expose last byte as guess:
         if len(data) >= 7:
@@ -252,52 +453,86 @@ class GyemsRmdRs485:
 
     def read_singleturn_angle_deg(self) -> float:
         cmd, mid, data = self._txrx(0x94)
-        if len(data) < 2:
-            raise GyemsProtocolError(f"Angle payload too short: {len(data)} bytes")
-        ang_u16 = struct.unpack("<H", data[0:2])[0]
-        return ang_u16 * 0.01
+        return self._parse_angle_deg(data)
 
     def set_speed_deg_s(self, speed_deg_s: float) -> None:
         val = int(speed_deg_s * 100)  # 0.01 deg/s units
-        payload = struct.pack("<i", val)
+        payload = _SPEED_STRUCT.pack(val)
         self._txrx(0xA2, payload)
 
+    def set_speed_read_angle_status(self, speed_deg_s: float) -> Tuple[float, GyemsStatus]:
+        """
+        Pipelined 0xA2 + 0x94 + 0x9C: Speed setzen, Winkel und Status lesen mit einem write.
+        Returns: (angle_deg, status). Siehe _txrx_many zur Bus-Voraussetzung.
+        """
+        payload = _SPEED_STRUCT.pack(int(speed_deg_s * 100))  # 0.01 deg/s units
+        _, (_, _, ang_data), (_, _, st_data) = self._txrx_many(((0xA2, payload), (0x94, b""), (0x9C, b"")))
+        return self._parse_angle_deg(ang_data), self._parse_status(st_data)
+
     def move_to_abs_angle_deg(self, angle_deg: float) -> None:
         """
         Absolute position move. Payload is int64 of 0.01° units.
         """
         val = int(angle_deg * 100)  # 0.01 deg
-        payload = struct.pack("<q", val)
+        payload = _ABS_STRUCT.pack(val)
         self._txrx(0xA3, payload)
 
-    def set_speed_deg_s_tx_only(self, speed_dps: float):
+    def set_speed_deg_s_tx_only(self, speed_dps: float) -> bool:
         """
         Speed command ohne Antwort abzuwarten (TX-only).
         Ideal für Regelkreis bei 10 Hz, weil Windows/USB ACKs sporadisch ausbleiben können.
+        Läuft gerade ein Request (z.B. read_status() aus einem Status-Thread), wird nicht
+        in dessen Antwort hineingesendet (Halbduplex): der Sollwert wird zurückgestellt
+        (neuester gewinnt) und direkt nach dem Request gesendet.
+        Returns: True wenn sofort gesendet, False wenn zurückgestellt.
         """
-        val = int(speed_dps * 100)  # 0.01 °/s LSB
-        payload = struct.pack("<i", val)  # <<< FIX
-        frame = self._build_frame(0xA2, payload)
-        self.ser.write(frame)
-        self.ser.flush()
-
-    def drain_rx(self, settle_s: float = 0.01, rounds: int = 2) -> int:
+        if not self._txrx_lock.acquire(blocking=False):
+            self._pending_speed_dps = speed_dps
+            return False
+        try:
+            self._pending_speed_dps = None   # veralteten Wert nicht mehr nachsenden
+            self._send_speed_frame(speed_dps)
+        finally:
+            self._txrx_lock.release()
+        return True
+
+    def _send_speed_frame(self, speed_dps: float) -> None:
+        """0xA2-Frame patchen + senden; Aufrufer haelt _txrx_lock."""
+        buf = self._speed_tx_buf
+        off = self.SPEED_PAYLOAD_OFF
+        with self._speed_tx_lock:
+            _SPEED_STRUCT.pack_into(buf, off, int(speed_dps * 100))  # 0.01 °/s LSB
+            buf[off + 4] = (buf[off] + buf[off + 1] + buf[off + 2] + buf[off + 3]) & 0xFF
+            self._write(buf)
+        # Antwort (falls vorhanden) wird nicht abgewartet -> naechsten Request kurz zurueckhalten
+        self._quiet_until = time.monotonic() + self.inter_cmd_delay
+
+    def drain_rx(self, min_bytes: int = 0) -> int:
         """
-        Liest alle aktuell anstehenden Bytes aus dem RX-Buffer und verwirft sie.
+        Verwirft alle anstehenden RX-Bytes (Treiber-Puffer + in_waiting), ohne feste Sleeps.
         Nützlich, wenn TX-only Commands trotzdem Antworten erzeugen, die wir nicht auswerten.
+        Liegt ein TX-only Kommando noch keine inter_cmd_delay zurück, wird nur bis dahin
+        gewartet, damit dessen Antwort mit verworfen wird und nicht als nächste gilt.
+        min_bytes > 0: zusätzlich bis zu self.timeout auf so viele Bytes warten (ein read).
         Returns: Anzahl verworfener Bytes.
         """
-        if not self.is_connected():
-            return 0
-        assert self.ser is not None
-
-        drained = 0
-        for _ in range(rounds):
-            time.sleep(settle_s)  # kurz warten, damit evtl. Antwortbytes eintreffen
-            n = getattr(self.ser, "in_waiting", 0)
-            if n and n > 0:
-                _ = self.ser.read(n)
-                drained += n
-            else:
-                break
-        return drained
\ No newline at end of file
+        # unter dem Lock (RLock, also auch aus _exchange heraus ok): sonst verwirft ein
+        # anderer Thread Bytes einer laufenden Antwort
+        with self._txrx_lock:
+            if not self.is_connected():
+                return 0
+            ser = self.ser
+
+            wait = self._quiet_until - time.monotonic()
+            if wait > 0.0:
+                time.sleep(wait)
+            self._quiet_until = 0.0
+
+            drained = len(self._rx_buf)
+            self._rx_buf.clear()
+            if min_bytes > 0:
+                drained += len(ser.read(min_bytes))
+            n = ser.in_waiting
+            if n:
+                drained += len(ser.read(n))
+            return drained
@@ -159,12 +159,12 @@ class GyemsWorker:
         self._publish_state()
         self._emit_info("GYEMS getrennt.")
 
-    def _cmd_read_model_info(self) -> None:
+    def _cmd_read_model_info(self, force: bool = False) -> None:
         motor = self._require_motor()
         if motor is None:
             return
         try:
-            info = motor.read_model_info()
+            info = motor.read_model_info(force=force)
             self._state.model_driver = info.driver
             self._state.model_motor = info.motor
             self._state.hw_version = info.hw_version
@@ -278,7 +278,7 @@ class GyemsWorker:
     def _poll_if_due(self) -> None:
         if self._motor is None or not self._state.connected:
             return
-        now = time.time()
+        now = time.monotonic()
         if now < self._next_poll_time:
             return
         self._next_poll_time = now + self.poll_interval_s
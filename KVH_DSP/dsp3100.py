@@ -13,6 +13,8 @@ import serial
 LSB_TO_DEG = 2.384e-8
 DEFAULT_BAUDRATE = 375000
 DEFAULT_SAMPLING_RATE_HZ = 1024.0
+FRAME_LEN = 5
+BUFFER_COMPACT_BYTES = 4096  # verbrauchte Bytes erst ab dieser Menge vorne abschneiden
 
 LogCallback = Callable[[str], None]
 
@@ -107,7 +109,10 @@ class DSP3100:
         self._log("Verbindung geschlossen.")
 
     def _read_loop(self) -> None:
+        # Blockweise lesen (alles was ansteht, mind. ein Paket) statt read(1) pro Byte;
+        # geparst wird ueber einen Lese-Index, damit Resync kein buffer[1:]-Kopieren kostet.
         buffer = bytearray()
+        head = 0
         skipped = 0
 
         while self.running:
@@ -117,7 +122,7 @@ class DSP3100:
                 continue
 
             try:
-                data = ser.read(1)
+                data = ser.read(max(ser.in_waiting, FRAME_LEN))
             except Exception as exc:
                 self._log(f"Lesefehler: {exc}")
                 self.running = False
@@ -126,16 +131,19 @@ class DSP3100:
             if not data:
                 continue
 
+            # eine Zeitabfrage pro Block, monoton (Drift-Dauer immun gegen NTP-/Uhrspruenge)
+            now = time.monotonic()
             buffer += data
+            end = len(buffer)
 
-            while len(buffer) >= 5:
-                block = bytes(buffer[:5])
-                checksum = (~sum(block[0:4])) & 0xFF
-                status_ok = (block[3] & 0x01) == 0
+            while end - head >= FRAME_LEN:
+                b3 = buffer[head + 3]
+                checksum = (~(buffer[head] + buffer[head + 1] + buffer[head + 2] + b3)) & 0xFF
+                status_ok = (b3 & 0x01) == 0
 
-                if block[4] == checksum and status_ok:
-                    angle_change_deg = self._decode_angle_change_deg(block)
-                    corrected_change_deg = self._apply_drift(angle_change_deg)
+                if buffer[head + 4] == checksum and status_ok:
+                    angle_change_deg = self._decode_angle_change_deg(buffer, head)
+                    corrected_change_deg = self._apply_drift(angle_change_deg, now)
                     rate_dps = corrected_change_deg * self.sampling_rate_hz
 
                     with self.lock:
@@ -145,16 +153,22 @@ class DSP3100:
                         self.skipped_bytes += skipped
 
                     skipped = 0
-                    buffer = buffer[5:]
+                    head += FRAME_LEN
                 else:
-                    buffer = buffer[1:]
+                    head += 1
                     skipped += 1
                     with self.lock:
                         self.skipped_bytes += 1
 
-    def _apply_drift(self, angle_change_deg: float) -> float:
+            if head == end:
+                buffer.clear()
+                head = 0
+            elif head >= BUFFER_COMPACT_BYTES:
+                del buffer[:head]
+                head = 0
+
+    def _apply_drift(self, angle_change_deg: float, now: float) -> float:
         if self._drift_active:
-            now = time.time()
             with self.lock:
                 self._drift_sum_deg += angle_change_deg
                 self._drift_count += 1
@@ -171,7 +185,7 @@ class DSP3100:
         with self.lock:
             if not self._drift_active:
                 return
-            duration = max(time.time() - self._drift_start, 0.0)
+            duration = max(time.monotonic() - self._drift_start, 0.0)
             count = self._drift_count
             if duration > 0.0 and count > 0:
                 drift = self._drift_sum_deg / duration
@@ -185,14 +199,15 @@ class DSP3100:
         self._log(message)
 
     @staticmethod
-    def _decode_angle_change_deg(packet: bytes) -> float:
-        raw = int.from_bytes(packet[0:3][::-1], byteorder="little", signed=True)
+    def _decode_angle_change_deg(packet: bytes | bytearray, offset: int = 0) -> float:
+        # Bytes offset..offset+2: 24 Bit big-endian, vorzeichenbehaftet
+        raw = int.from_bytes(packet[offset:offset + 3], byteorder="big", signed=True)
         return raw * LSB_TO_DEG * -2.0
 
     def snapshot(self) -> DSP3100Snapshot:
         with self.lock:
             if self._drift_active:
-                elapsed = max(time.time() - self._drift_start, 0.0)
+                elapsed = max(time.monotonic() - self._drift_start, 0.0)
             else:
                 elapsed = self._drift_duration_s if self._pending_drift_dps is not None else 0.0
 
@@ -239,7 +254,7 @@ class DSP3100:
             self._drift_sum_deg = 0.0
             self._drift_count = 0
             self._drift_duration_s = float(seconds)
-            self._drift_start = time.time()
+            self._drift_start = time.monotonic()
             self._drift_active = True
             self._pending_drift_dps = None
 
@@ -1,9 +1,24 @@
+import sys
 import serial
 import threading
 import time
 
+from serial_common.ftdi import set_ftdi_latency_timer
+
+try:
+    from .dsp_parse import FRAME_LEN, parse_frames
+except ImportError:
+    from dsp_parse import FRAME_LEN, parse_frames
+
 LSB_TO_DEG = 2.384e-8
+DEG_PER_LSB = LSB_TO_DEG * -2  # Rohwert (24 Bit) -> Winkeländerung in °
 PRINT_INTERVAL = 1.0  # Nur für Testzwecke
+BUFFER_COMPACT_BYTES = 4096  # verbrauchte Bytes erst ab dieser Menge vorne abschneiden
+# read() kehrt mit den ersten vollständigen Paketen zurück; der Timeout greift nur, wenn der
+# Sensor schweigt (und bestimmt, wie schnell disconnect() den Lese-Thread beendet)
+READ_TIMEOUT_S = 0.01
+FTDI_LATENCY_MS = 1          # FTDI-Default 16 ms -> Pakete kämen in 16-ms-Bündeln
+WIN_RX_BUFFER_SIZE = 65536
 
 
 class DSP3100:
@@ -17,16 +32,23 @@ class DSP3100:
         self.skipped_bytes = 0
         self.lock = threading.Lock()
 
-        self.drift = 0.0  # °/s
-        self.sampling_rate = 1024  # Hz (wenn du das weißt)
+        self._drift = 0.0
+        self._sampling_rate = 1024
+        self._update_drift_constants()
 
         self._drift_active = False
-        self._drift_sum = 0.0
+        self._drift_raw_sum = 0  # Rohwerte als int: exakt, kein Float-Fehler über lange Messungen
         self._drift_count = 0
         self._drift_start = 0.0
         self._drift_duration = 0.0
 
         self.rate_dps = 0.0
+        self.rate_t = 0.0  # time.monotonic() des letzten gültigen Pakets (0.0 = noch keins)
+
+        # angle/rate_dps/rate_t/valid_packets/skipped_bytes schreibt nur der Lese-Thread, per
+        # einfacher Zuweisung (unter dem GIL atomar) -> Leser brauchen kein Lock.
+        # reset_angle() setzt nur dieses Flag, genullt wird im Lese-Thread.
+        self._reset_angle = False
 
     def connect(self, port, baudrate=375000):
         try:
@@ -36,9 +58,18 @@ class DSP3100:
                 bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_ODD,
                 stopbits=serial.STOPBITS_ONE,
-                timeout=1
+                timeout=READ_TIMEOUT_S
             )
+            if not set_ftdi_latency_timer(port, FTDI_LATENCY_MS) and sys.platform.startswith("linux"):
+                print(f"⚠️ FTDI latency_timer für {port} nicht gesetzt (Rechte?), RX kommt ggf. gebündelt.")
+            # set_buffer_size gibt es nur in der Windows-Implementierung von pyserial
+            if hasattr(self.ser, "set_buffer_size"):
+                try:
+                    self.ser.set_buffer_size(rx_size=WIN_RX_BUFFER_SIZE)
+                except Exception:
+                    pass
             print(f"✅ Verbunden mit {port} @ {baudrate} Baud.")
+            parse_frames(bytearray(FRAME_LEN), 0, FRAME_LEN)  # Warm-up (ggf. JIT-Kompilierung)
             self.running = True
             self.thread = threading.Thread(target=self._read_loop, daemon=True)
             self.thread.start()
@@ -56,89 +87,130 @@ class DSP3100:
         self.ser = None
 
     def _read_loop(self):
+        # Blockweise lesen (alles was ansteht, mind. ein Paket) statt read(1) pro Byte;
+        # geparst wird über einen Lese-Index, damit Resync kein buffer[1:]-Kopieren kostet.
+        ser = self.ser
         buffer = bytearray()
+        head = 0
         skipped = 0
-        last_print = time.time()
+        angle = self.angle
+        valid_packets = self.valid_packets
+        skipped_bytes = self.skipped_bytes
+        last_print = time.monotonic()
 
         while self.running:
-            b = self.ser.read(1)
-            if len(b) == 0:
+            chunk = ser.read(max(ser.in_waiting, FRAME_LEN))
+            if not chunk:
                 continue
+            # eine Zeitabfrage pro Block, monoton (Drift-Dauer immun gegen NTP-/Uhrsprünge)
+            now = time.monotonic()
+
+            buffer += chunk
+            end = len(buffer)
+
+            # Alle vollständigen Pakete des Blocks dekodieren (dsp_parse, optional Numba/nogil),
+            # erst danach einmal skalieren / driftkorrigieren / publizieren.
+            head, raw_sum, raw_last, n_valid, n_skipped = parse_frames(buffer, head, end)
+            skipped += n_skipped
+
+            if n_valid:
+                angle_change = raw_sum * DEG_PER_LSB
+
+                # Falls Driftmessung aktiv ist
+                if self._drift_active:
+                    self._drift_raw_sum += raw_sum  # nicht korrigiert!
+                    self._drift_count += n_valid
+
+                    if now - self._drift_start >= self._drift_duration:
+                        duration = now - self._drift_start
+                        if duration > 0 and self._drift_count > 0:
+                            with self.lock:
+                                self.drift = self._drift_raw_sum * DEG_PER_LSB / duration
+                            print(f"✅ Drift abgeschlossen: {self.drift:.10f} °/s aus {self._drift_count} Messungen")
+                        else:
+                            print("⚠️ Driftmessung fehlgeschlagen.")
+                        self._drift_active = False
+
+                # Driftkompensation anwenden (Konstanten vorberechnet, siehe _update_drift_constants)
+                corrected_change = angle_change - n_valid * self._drift_per_sample
+
+                # Drehrate aus dem letzten Paket des Blocks
+                rate_dps = raw_last * self._dps_per_lsb - self._drift
+
+                if self._reset_angle:
+                    self._reset_angle = False
+                    angle = 0.0
+                angle += corrected_change
+                valid_packets += n_valid
+                skipped_bytes += skipped
+                skipped = 0
+
+                self.rate_dps = rate_dps
+                self.rate_t = now
+                self.angle = angle
+                self.valid_packets = valid_packets
+                self.skipped_bytes = skipped_bytes
+
+            if head == end:
+                buffer.clear()
+                head = 0
+            elif head >= BUFFER_COMPACT_BYTES:
+                del buffer[:head]
+                head = 0
 
-            buffer += b
-
-            while len(buffer) >= 5:
-                block = buffer[:5]
-                checksum = (~sum(block[0:4])) & 0xFF
-                status_ok = (block[3] & 0x01) == 0
-
-                if block[4] == checksum and status_ok:
-                    angle_change = self._decode_angle(block)
-
-                    # Falls Driftmessung aktiv ist
-                    if self._drift_active:
-                        now = time.time()
-                        self._drift_sum += angle_change  # nicht korrigiert!
-                        self._drift_count += 1
-
-                        if now - self._drift_start >= self._drift_duration:
-                            duration = now - self._drift_start
-                            if duration > 0 and self._drift_count > 0:
-                                with self.lock:
-                                    self.drift = self._drift_sum / duration
-                                print(f"✅ Drift abgeschlossen: {self.drift:.10f} °/s aus {self._drift_count} Messungen")
-                            else:
-                                print("⚠️ Driftmessung fehlgeschlagen.")
-                            self._drift_active = False
-
-                    # Driftkompensation anwenden
-                    drift_correction = self.drift / self.sampling_rate
-                    corrected_change = angle_change - drift_correction
-
-                    rate_dps = corrected_change * self.sampling_rate
-
-                    with self.lock:
-                        self.rate_dps = rate_dps
-
-                    with self.lock:
-                        self.angle += corrected_change
-                        self.valid_packets += 1
-                        self.skipped_bytes += skipped
-                    skipped = 0
-                    buffer = buffer[5:]
-                else:
-                    buffer = buffer[1:]
-                    skipped += 1
-                    self.skipped_bytes += 1
-
-            now = time.time()
             if now - last_print >= 1.0:  # einmal pro Sekunde
-                with self.lock:
-                    print(f"🧭 Aktueller Winkel: {self.angle:+.6f}°")
+                print(f"🧭 Aktueller Winkel: {angle:+.6f}°")
                 last_print = now
 
-    def _decode_angle(self, packet):
-        raw = int.from_bytes(packet[0:3][::-1], byteorder='little', signed=True)
-        return raw * LSB_TO_DEG * -2
+    @property
+    def drift(self):
+        return self._drift  # °/s
+
+    @drift.setter
+    def drift(self, value):
+        self._drift = value
+        self._update_drift_constants()
+
+    @property
+    def sampling_rate(self):
+        return self._sampling_rate  # Hz (wenn du das weißt)
+
+    @sampling_rate.setter
+    def sampling_rate(self, value):
+        self._sampling_rate = value
+        self._update_drift_constants()
+
+    def _update_drift_constants(self):
+        # Division/Multiplikation nur bei Änderung von drift/sampling_rate, nicht pro Block
+        self._drift_per_sample = self._drift / self._sampling_rate  # ° pro Paket
+        self._dps_per_lsb = DEG_PER_LSB * self._sampling_rate      # Rohwert -> °/s
 
     def get_angle(self):
-        with self.lock:
-            return self.angle
+        return self.angle
 
     def get_drift(self):
-        with self.lock:
-            return self.drift
+        return self.drift
 
     def reset_angle(self):
-        with self.lock:
-            self.angle = 0.0
+        # sofort sichtbar; der Lese-Thread startet beim nächsten Block ebenfalls bei 0
+        self._reset_angle = True
+        self.angle = 0.0
+
+    def get_drift_estimate(self):
+        """Laufender Drift-Schätzwert (°/s) während determine_drift, sonst None."""
+        if not self._drift_active:
+            return None
+        elapsed = time.monotonic() - self._drift_start
+        if elapsed <= 0:
+            return None
+        return self._drift_raw_sum * DEG_PER_LSB / elapsed
 
     def determine_drift(self, sekunden):
         with self.lock:
-            self._drift_sum = 0.0
+            self._drift_raw_sum = 0
             self._drift_count = 0
             self._drift_duration = sekunden
-            self._drift_start = time.time()
+            self._drift_start = time.monotonic()
             self._drift_active = True
             self.drift = 0.0  # Vorherige Drift zurücksetzen
         print(f"⚙️ Starte Driftmessung über {sekunden} Sekunden...")
@@ -0,0 +1,57 @@
+# KVH_DSP_3100/dsp_parse.py
+"""
+Frame-Parser des DSP-3100 (5-Byte-Pakete) als reine Funktion ohne I/O, damit er
+optional mit Numba (nopython, nogil) kompiliert werden kann.
+
+Paket: [D2, D1, D0, STATUS, CHK], Winkeländerung = 24 Bit big-endian mit Vorzeichen,
+CHK = ~(D2 + D1 + D0 + STATUS) & 0xFF, STATUS Bit 0 = 0 -> gültig.
+
+Numba ist optional: ohne Installation läuft parse_frames als normales Python.
+"""
+from __future__ import annotations
+
+try:
+    from numba import njit
+except ImportError:  # Numba nicht installiert -> reines Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+FRAME_LEN = 5
+
+
+@njit(cache=True, nogil=True)
+def parse_frames(buf, head: int, end: int) -> tuple[int, int, int, int, int]:
+    """
+    Alle vollständigen Pakete in buf[head:end] dekodieren (Resync byteweise).
+
+    Returns: (head, raw_sum, raw_last, n_valid, skipped)
+        head      erstes noch nicht verbrauchtes Byte
+        raw_sum   Summe der Rohwerte aller gültigen Pakete
+        raw_last  Rohwert des letzten gültigen Pakets (0 wenn keins)
+        n_valid   Anzahl gültiger Pakete
+        skipped   beim Resync verworfene Bytes
+    """
+    raw_sum = 0
+    raw_last = 0
+    n_valid = 0
+    skipped = 0
+    while end - head >= FRAME_LEN:
+        b0 = buf[head]
+        b1 = buf[head + 1]
+        b2 = buf[head + 2]
+        b3 = buf[head + 3]
+        checksum = (~(b0 + b1 + b2 + b3)) & 0xFF
+
+        if buf[head + 4] == checksum and (b3 & 0x01) == 0:
+            raw_last = (b0 << 16) | (b1 << 8) | b2
+            if raw_last & 0x800000:
+                raw_last -= 0x1000000
+            raw_sum += raw_last
+            n_valid += 1
+            head += FRAME_LEN
+        else:
+            head += 1
+            skipped += 1
+    return head, raw_sum, raw_last, n_valid, skipped
@@ -1,16 +1,29 @@
 # ARN/arn_controller.py
 from __future__ import annotations
 
+import os
+import queue
+import sys
 import time
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional
 
 from GYEMS.gyems_rs485 import GyemsRmdRs485, GyemsStatus
 from KVH_DSP_3100.dsp3100 import DSP3100
 
+try:
+    from .arn_math import compute_cmd
+except ImportError:
+    from arn_math import compute_cmd
 
-@dataclass
+# max. Wartezeit der GUI auf eine vom Status-Thread ausgeführte Zero-Anfrage
+ZERO_REQUEST_TIMEOUT_S = 2.0
+# in diesen Schritten wird geprüft, ob der Status-Thread noch lebt (sonst sofort abbrechen)
+ZERO_REQUEST_POLL_S = 0.05
+
+
+@dataclass(slots=True)
 class ArnParams:
     loop_hz: float = 10.0
     status_hz: float = 1.0
@@ -23,8 +36,16 @@ class ArnParams:
     # Status watchdog: nur wenn Status X-mal in Folge final scheitert -> stop
     status_fail_max_in_row: int = 5
 
+    # Echtzeit-Priorität für den Control-Thread (Linux: SCHED_FIFO-Prio, 0 = aus)
+    control_rt_priority: int = 10
+
+    # CPU-Pinning (nur Linux, None = aus), z.B. control_cpu=7, status_cpu=6
+    # mit Kernel-Cmdline `isolcpus=6,7 nohz_full=6,7`
+    control_cpu: Optional[int] = None
+    status_cpu: Optional[int] = None
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ArnSnapshot:
     t_s: float = 0.0
     running: bool = False
@@ -35,6 +56,7 @@ class ArnSnapshot:
     dsp_heading_deg: float = 0.0     # 0° = Nord (nach Zero)
 
     cmd_dps: float = 0.0
+    loop_dt_s: float = 0.0           # gemessener Abstand der letzten beiden Control-Ticks
 
     gyems_status: Optional[GyemsStatus] = None
     gyems_angle_deg: float = 0.0     # raw singleturn (0..360)
@@ -43,55 +65,120 @@ class ArnSnapshot:
     status_ok: int = 0
     status_timeouts: int = 0
     status_fail_row: int = 0
+    status_dt_s: float = 0.0         # aktuelles Status-Intervall (inkl. Backoff)
 
     last_error: str = ""
 
 
-def _clamp(x: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, x))
+def _pin_current_thread(cpu: Optional[int]) -> bool:
+    """
+    Pinnt den aufrufenden Thread auf einen CPU-Kern (best effort, nur Linux).
+    Returns: True wenn erfolgreich.
+    """
+    if cpu is None or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        # pid 0 = aufrufender Thread
+        os.sched_setaffinity(0, {int(cpu)})
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _boost_current_thread(rt_priority: int) -> bool:
+    """
+    Hebt die Priorität des aufrufenden Threads an (best effort).
+      - Linux: SCHED_FIFO mit rt_priority (benötigt CAP_SYS_NICE bzw. root,
+        z.B. `setcap cap_sys_nice+ep $(readlink -f $(which python3))`)
+      - Windows: THREAD_PRIORITY_TIME_CRITICAL (15)
+    Returns: True wenn erfolgreich.
+    """
+    if rt_priority <= 0:
+        return False
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 15))
+        if hasattr(os, "sched_setscheduler"):
+            # pid 0 = aufrufender Thread (Linux: sched_* wirkt pro Thread)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rt_priority))
+            return True
+    except (OSError, AttributeError):
+        pass
+    return False
 
 
 class ArnController:
     """
     Headless ARN controller:
       - DSP3100 läuft in eigener Thread-Logik (deine Klasse)
-      - 10 Hz: Speed command TX-only (keine ACK-Abhängigkeit)
+      - 10 Hz: Speed command TX-only (keine ACK-Abhängigkeit), gesendet von
+        eigenem TX-Thread über 1-Slot-Mailbox (latest wins)
       - 1 Hz: read_status() + read_singleturn_angle_deg() (ACK), Watchdog
       - snapshot für GUI (thread-safe)
       - Zero-Funktion setzt aktuelle Orientierung auf 0° (= Nord)
+      - GUI-Kommandos über post() -> Queue -> eigener Command-Thread (seriell)
     """
 
     def __init__(self, params: Optional[ArnParams] = None):
         self.params = params or ArnParams()
+        self._gain = self.params.gyro_sign * self.params.kp   # via set_params() aktuell halten
 
         self.dsp: Optional[DSP3100] = None
         self.gy: Optional[GyemsRmdRs485] = None
 
         self._t0 = 0.0
         self._run_evt = threading.Event()
+        self._stop_evt = threading.Event()     # weckt die Loops bei stop() sofort auf
+
+        # Zero-Anfrage an den Status-Thread (einziger RS-485-Leser während des Laufs)
+        self._status_wake = threading.Event()  # stop() oder Zero-Anfrage
+        self._zero_request = threading.Event()
+        self._zero_done = threading.Event()
+
+        # 1-Slot-Mailbox Control -> TX-Thread (latest wins)
+        self._cmd_mailbox = 0.0
+        self._cmd_evt = threading.Event()
 
         self._control_thread: Optional[threading.Thread] = None
+        self._tx_thread: Optional[threading.Thread] = None
         self._status_thread: Optional[threading.Thread] = None
 
-        self._lock = threading.Lock()          # schützt snapshot + offsets + error
-        self._io_lock = threading.Lock()       # schützt ACK-I/O (Status/Angle)
+        self._lock = threading.Lock()          # serialisiert nur die Snapshot-Writer
+        self._zero_lock = threading.Lock()     # nur für konsistentes Setzen beider Offsets
 
+        # immutable Snapshot: Writer ersetzen ihn komplett, Leser brauchen keinen Lock
         self._snap = ArnSnapshot()
 
-        self._status_ok = 0
-        self._status_to = 0
-        self._status_fail_row = 0
+        # Status-Zähler (ok, timeouts, fail_row) als Tupel: eine Zuweisung = kohärentes Tripel
+        self._counters = (0, 0, 0)
 
         # Zero offsets: heading = (angle - offset) mod 360
+        # (plain floats, Lesen ohne Lock; float-Store ist unter dem GIL atomar)
         self._dsp_zero_offset = 0.0
         self._gyems_zero_offset = 0.0
 
+        # GUI -> Controller: Kommandos werden seriell im Command-Thread ausgeführt,
+        # der Tk-Thread blockiert so nie auf I/O oder Locks
+        self._cmd_q: "queue.Queue[tuple[str, dict]]" = queue.Queue()
+        self._cmd_thread = threading.Thread(target=self._command_loop, daemon=True)
+        self._cmd_thread.start()
+
+    # ---------- commands ----------
+    def post(self, name: str, **kwargs) -> None:
+        """
+        Kommando asynchron einreihen (z.B. aus dem Tk-Thread).
+        name: "connect" | "disconnect" | "start" | "stop" | "zero" | "set_params"
+        Fehler landen in snapshot.last_error.
+        """
+        self._cmd_q.put((name, kwargs))
+
     # ---------- lifecycle ----------
     def connect(self, dsp_port: str, gyems_port: str) -> None:
         with self._lock:
-            self._snap = ArnSnapshot()
-            self._snap.connected = False
-            self._snap.last_error = ""
+            self._snap = ArnSnapshot(connected=False, last_error="")
 
         # DSP
         self.dsp = DSP3100()
@@ -104,8 +191,7 @@ class ArnController:
         # initial zero = current pose
         self.zero_orientation()
 
-        with self._lock:
-            self._snap.connected = True
+        self._publish(connected=True)
 
     def disconnect(self) -> None:
         self.stop()
@@ -128,8 +214,7 @@ class ArnController:
                 pass
             self.dsp = None
 
-        with self._lock:
-            self._snap.connected = False
+        self._publish(connected=False)
 
     def start(self) -> None:
         if not (self.dsp and self.gy):
@@ -138,27 +223,40 @@ class ArnController:
         if self._run_evt.is_set():
             return
 
-        self._t0 = time.time()
+        self._t0 = time.monotonic()
+        self._stop_evt.clear()
+        self._status_wake.clear()
+        self._zero_request.clear()
         self._run_evt.set()
 
         # reset counters
-        self._status_ok = 0
-        self._status_to = 0
-        self._status_fail_row = 0
+        self._counters = (0, 0, 0)
 
+        self._cmd_mailbox = 0.0
+        self._cmd_evt.clear()
+
+        self._tx_thread = threading.Thread(target=self._tx_loop, daemon=True)
         self._control_thread = threading.Thread(target=self._control_loop, daemon=True)
         self._status_thread = threading.Thread(target=self._status_loop, daemon=True)
+        self._tx_thread.start()
         self._control_thread.start()
         self._status_thread.start()
 
-        with self._lock:
-            self._snap.running = True
+        self._publish(running=True)
 
     def stop(self) -> None:
         if not self._run_evt.is_set():
             return
 
         self._run_evt.clear()
+        self._stop_evt.set()
+        self._status_wake.set()
+        self._cmd_evt.set()
+
+        # TX-Thread auslaufen lassen, damit sich der Stop-Frame nicht mit einem Speed-Frame mischt
+        tx = self._tx_thread
+        if tx is not None and tx is not threading.current_thread():
+            tx.join(timeout=0.5)
 
         if self.gy:
             try:
@@ -166,8 +264,7 @@ class ArnController:
             except Exception:
                 pass
 
-        with self._lock:
-            self._snap.running = False
+        self._publish(running=False)
 
     # ---------- params ----------
     def set_params(
@@ -186,12 +283,37 @@ class ArnController:
         if max_dps is not None:
             self.params.max_dps = float(max_dps)
 
+        # gyro_sign * kp einmal pro Parameteränderung statt pro Tick
+        self._gain = self.params.gyro_sign * self.params.kp
+
     # ---------- zero / heading ----------
     def zero_orientation(self) -> None:
         """
         Setzt aktuelle Orientierung auf 0° (Nord) für DSP und GYEMS
         und synchronisiert sofort den Snapshot (GUI).
+
+        Läuft der Regelkreis, wird die Anfrage an den Status-Thread übergeben,
+        damit alle ACK-Reads auf dem RS-485-Bus von genau einem Thread kommen.
         """
+        status_thread = self._status_thread
+        if self._run_evt.is_set() and status_thread is not None and status_thread.is_alive():
+            self._zero_done.clear()
+            self._zero_request.set()
+            self._status_wake.set()
+            deadline = time.monotonic() + ZERO_REQUEST_TIMEOUT_S
+            while not self._zero_done.wait(timeout=ZERO_REQUEST_POLL_S):
+                if not status_thread.is_alive():
+                    self._zero_request.clear()
+                    self._set_error("Zero request failed (status thread stopped)")
+                    return
+                if time.monotonic() >= deadline:
+                    self._set_error("Zero request timed out (status thread busy)")
+                    return
+            return
+
+        self._zero_now()
+
+    def _zero_now(self) -> None:
         dsp_angle = 0.0
         if self.dsp:
             try:
@@ -202,114 +324,208 @@ class ArnController:
         gy_angle = 0.0
         if self.gy:
             try:
-                with self._io_lock:
-                    gy_angle = float(self.gy.read_singleturn_angle_deg())
+                gy_angle = float(self.gy.read_singleturn_angle_deg())
             except Exception:
                 gy_angle = 0.0
 
-        with self._lock:
+        with self._zero_lock:
             # Offsets setzen
             self._dsp_zero_offset = dsp_angle
             self._gyems_zero_offset = gy_angle
 
-            # <<< WICHTIG: Snapshot sofort auf 0° setzen >>>
-            self._snap.dsp_heading_deg = 0.0
-            self._snap.gyems_heading_deg = 0.0
-            self._snap.dsp_angle_deg = dsp_angle
-            self._snap.gyems_angle_deg = gy_angle
+        # <<< WICHTIG: Snapshot sofort auf 0° setzen >>>
+        self._publish(
+            dsp_heading_deg=0.0,
+            gyems_heading_deg=0.0,
+            dsp_angle_deg=dsp_angle,
+            gyems_angle_deg=gy_angle,
+        )
 
     # ---------- snapshot ----------
     def get_snapshot(self) -> ArnSnapshot:
-        with self._lock:
-            return ArnSnapshot(**self._snap.__dict__)
+        # frozen -> kann ohne Kopie und ohne Lock herausgegeben werden
+        return self._snap
 
     # ---------- internals ----------
-    def _set_error(self, msg: str) -> None:
+    def _publish(self, **changes) -> None:
+        """Neuen Snapshot bauen und mit einer einzigen Zuweisung veröffentlichen."""
         with self._lock:
-            self._snap.last_error = msg
+            self._snap = replace(self._snap, **changes)
+
+    def _set_error(self, msg: str) -> None:
+        self._publish(last_error=msg)
+
+    def _command_loop(self) -> None:
+        handlers = {
+            "connect": self.connect,
+            "disconnect": self.disconnect,
+            "start": self.start,
+            "stop": self.stop,
+            "zero": self.zero_orientation,
+            "set_params": self.set_params,
+        }
+        while True:
+            name, kwargs = self._cmd_q.get()
+            handler = handlers.get(name)
+            if handler is None:
+                self._set_error(f"Unknown command: {name}")
+                continue
+            try:
+                handler(**kwargs)
+            except Exception as e:
+                self._set_error(f"{name.capitalize()} failed: {type(e).__name__}: {e}")
 
     def _control_loop(self) -> None:
         assert self.dsp is not None and self.gy is not None
 
-        dt = 1.0 / self.params.loop_hz
-        next_tick = time.time()
-
-        while self._run_evt.is_set():
-            now = time.time()
-            if now < next_tick:
-                time.sleep(min(0.01, next_tick - now))
-                continue
+        # nur der Control-Thread wird angehoben, Status (1 Hz) bleibt normal
+        _boost_current_thread(self.params.control_rt_priority)
+        _pin_current_thread(self.params.control_cpu)
+
+        # Attribut-Lookups einmal vor der Schleife auflösen
+        dsp = self.dsp
+        params = self.params            # gleiches Objekt, set_params() wirkt weiterhin
+        run = self._run_evt
+        stop_wait = self._stop_evt.wait
+        cmd_evt_set = self._cmd_evt.set
+        publish = self._publish
+        get_angle = dsp.get_angle
+        monotonic = time.monotonic
+        t0 = self._t0
+
+        dt = 1.0 / params.loop_hz
+        next_tick = monotonic()
+        t_prev = next_tick
+
+        while run.is_set():
+            # einmal blockierend bis zur absoluten Deadline warten (stop() weckt sofort)
+            if stop_wait(timeout=max(0.0, next_tick - monotonic())):
+                break
+            now = monotonic()
             next_tick += dt
+            if now > next_tick:
+                # Ticks verpasst -> neu aufsetzen statt Catch-up-Burst
+                next_tick = now + dt
+
+            # tatsächliches dt statt nominal 1/loop_hz (für zeitabhängige Terme, z.B. I-Anteil)
+            dt_meas = now - t_prev
+            t_prev = now
+
+            # Regelpfad zuerst und ohne try: rate ist in DSP3100.__init__ mit 0.0 belegt,
+            # compute_cmd ist rein rechnerisch -> ein Winkel-Fehler verzögert kein Kommando
+            rate = dsp.rate_dps
+            # P + deadband (Sollrate = 0), gyro_sign ist in _gain enthalten
+            cmd = compute_cmd(rate, self._gain, params.deadband_dps, params.max_dps)
+
+            # TX-only command -> Mailbox, Senden übernimmt _tx_loop
+            self._cmd_mailbox = cmd
+            cmd_evt_set()
 
-            # DSP values
-            rate = float(getattr(self.dsp, "rate_dps", 0.0))
+            # nur Winkel/Heading fürs GUI; bei Fehler wie bisher 0°
             try:
-                angle = float(self.dsp.get_angle())
+                angle = float(get_angle())
             except Exception:
                 angle = 0.0
+            dsp_heading = (angle - self._dsp_zero_offset) % 360.0
+
+            publish(
+                t_s=now - t0,
+                dsp_rate_dps=rate,
+                dsp_angle_deg=angle,
+                dsp_heading_deg=dsp_heading,
+                cmd_dps=cmd,
+                loop_dt_s=dt_meas,
+            )
+
+    def _tx_loop(self) -> None:
+        assert self.gy is not None
 
-            with self._lock:
-                dsp_heading = (angle - self._dsp_zero_offset) % 360.0
+        dt = 1.0 / self.params.loop_hz
 
-            # P + deadband (Sollrate = 0)
-            error = self.params.gyro_sign * (-rate)
-            if abs(error) < self.params.deadband_dps:
-                error = 0.0
-            cmd = _clamp(self.params.kp * error, -self.params.max_dps, +self.params.max_dps)
+        while self._run_evt.is_set():
+            if not self._cmd_evt.wait(timeout=dt):
+                continue
+            self._cmd_evt.clear()
+            if not self._run_evt.is_set():
+                break
 
-            # TX-only command
+            cmd = self._cmd_mailbox
             try:
                 self.gy.set_speed_deg_s_tx_only(cmd)
             except Exception as e:
                 self._set_error(f"TX-only send failed: {type(e).__name__}: {e}")
 
-            with self._lock:
-                self._snap.t_s = now - self._t0
-                self._snap.dsp_rate_dps = rate
-                self._snap.dsp_angle_deg = angle
-                self._snap.dsp_heading_deg = dsp_heading
-                self._snap.cmd_dps = cmd
-
     def _status_loop(self) -> None:
         assert self.gy is not None
 
+        _pin_current_thread(self.params.status_cpu)
+
         dt = 1.0 / self.params.status_hz
-        next_tick = time.time()
+        status_dt = dt                  # wird bei Timeouts in Folge gestreckt (Backoff)
+        next_tick = time.monotonic()
 
         while self._run_evt.is_set():
-            now = time.time()
+            # wacht zur Deadline, bei stop() oder bei einer Zero-Anfrage auf
+            self._status_wake.wait(timeout=max(0.0, next_tick - time.monotonic()))
+            self._status_wake.clear()
+            if not self._run_evt.is_set():
+                break
+
+            if self._zero_request.is_set():
+                self._zero_request.clear()
+                self._zero_now()
+                self._zero_done.set()
+
+            now = time.monotonic()
             if now < next_tick:
-                time.sleep(min(0.05, next_tick - now))
                 continue
-            next_tick += dt
+            next_tick += status_dt
+            if now > next_tick:
+                next_tick = now + status_dt
 
             try:
-                with self._io_lock:
-                    self.gy.drain_rx()
-                    st = self.gy.read_status()
-                    gy_ang = float(self.gy.read_singleturn_angle_deg())
-
-                self._status_ok += 1
-                self._status_fail_row = 0
-
-                with self._lock:
-                    self._snap.gyems_status = st
-                    self._snap.gyems_angle_deg = gy_ang
-                    self._snap.gyems_heading_deg = (gy_ang - self._gyems_zero_offset) % 360.0
-                    self._snap.status_ok = self._status_ok
-                    self._snap.status_timeouts = self._status_to
-                    self._snap.status_fail_row = self._status_fail_row
+                self.gy.drain_rx()
+                st = self.gy.read_status()
+                gy_ang = float(self.gy.read_singleturn_angle_deg())
+
+                ok, to, _ = self._counters
+                self._counters = (ok + 1, to, 0)
+
+                if status_dt != dt:
+                    # Bus wieder ok -> sofort zurück auf Basisrate
+                    status_dt = dt
+                    next_tick = now + dt
+
+                gy_offset = self._gyems_zero_offset
+                self._publish(
+                    gyems_status=st,
+                    gyems_angle_deg=gy_ang,
+                    gyems_heading_deg=(gy_ang - gy_offset) % 360.0,
+                    status_ok=ok + 1,
+                    status_timeouts=to,
+                    status_fail_row=0,
+                    status_dt_s=status_dt,
+                )
 
             except TimeoutError:
-                self._status_to += 1
-                self._status_fail_row += 1
-
-                with self._lock:
-                    self._snap.status_ok = self._status_ok
-                    self._snap.status_timeouts = self._status_to
-                    self._snap.status_fail_row = self._status_fail_row
-
-                if self._status_fail_row >= self.params.status_fail_max_in_row:
+                ok, to, row = self._counters
+                row += 1
+                self._counters = (ok, to + 1, row)
+
+                # gestufter Backoff vor dem Hard-Stop: ab 2 Timeouts 1/2, ab 4 Timeouts 1/4 Rate
+                backoff_dt = dt * (4.0 if row >= 4 else 2.0 if row >= 2 else 1.0)
+                if backoff_dt != status_dt:
+                    status_dt = backoff_dt
+                    next_tick = now + status_dt
+
+                self._publish(
+                    status_ok=ok,
+                    status_timeouts=to + 1,
+                    status_fail_row=row,
+                    status_dt_s=status_dt,
+                )
+
+                if row >= self.params.status_fail_max_in_row:
                     self._set_error("Status watchdog triggered (too many timeouts in a row)")
                     self.stop()
                     return
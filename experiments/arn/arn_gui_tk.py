@@ -7,6 +7,13 @@ from GYEMS.gyems_rs485 import GyemsRmdRs485
 from ARN.arn_controller import ArnController, ArnParams
 
 
+# (cos, sin) der Kompass-Ticks alle 30° (0° = Nord, im Uhrzeigersinn)
+_TICK_CS = tuple(
+    (math.cos(math.radians(90.0 - deg)), math.sin(math.radians(90.0 - deg)))
+    for deg in range(0, 360, 30)
+)
+
+
 class ArnGui(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -15,6 +22,12 @@ class ArnGui(tk.Tk):
 
         self.ctrl = ArnController(ArnParams())
 
+        # zuletzt angezeigte Werte (Label-Texte, Kompasszustand)
+        self._last: dict = {}
+
+        # Kompass: (w, h, cx, cy, L) der statischen Items, None = noch nicht gebaut
+        self._compass_geom = None
+
         self._build_ui()
         self._schedule_update()
 
@@ -89,7 +102,10 @@ class ArnGui(tk.Tk):
         self.lbl_run.pack(anchor="w", pady=(0, 6))
 
         self.lbl_t = ttk.Label(right, text="t: 0.0 s")
-        self.lbl_t.pack(anchor="w", pady=(0, 10))
+        self.lbl_t.pack(anchor="w")
+
+        self.lbl_loop_dt = ttk.Label(right, text="Loop dt: - ms")
+        self.lbl_loop_dt.pack(anchor="w", pady=(0, 10))
 
         ttk.Separator(right).pack(fill=tk.X, pady=8)
 
@@ -128,7 +144,8 @@ class ArnGui(tk.Tk):
 
     def apply_params(self):
         gyro_sign = -1.0 if self.var_invert.get() else 1.0
-        self.ctrl.set_params(
+        self.ctrl.post(
+            "set_params",
             kp=self.var_kp.get(),
             deadband_dps=self.var_deadband.get(),
             gyro_sign=gyro_sign,
@@ -136,54 +153,37 @@ class ArnGui(tk.Tk):
         )
 
     # ---- button handlers ----
+    # Alle Aktionen werden nur eingereiht; ausgeführt werden sie im Command-Thread
+    # des Controllers, Fehler erscheinen dort als "Last error".
     def on_connect(self):
-        try:
-            self.ctrl.connect(dsp_port=self.var_dsp_port.get(), gyems_port=self.var_gy_port.get())
-            self.apply_params()
-        except Exception as e:
-            # (kleiner Hack: Fehlertext in Snapshot)
-            try:
-                self.ctrl._set_error(f"Connect failed: {type(e).__name__}: {e}")
-            except Exception:
-                pass
+        self.ctrl.post("connect", dsp_port=self.var_dsp_port.get(), gyems_port=self.var_gy_port.get())
+        self._post_params()
 
     def on_disconnect(self):
-        try:
-            self.ctrl.disconnect()
-        except Exception:
-            pass
+        self.ctrl.post("disconnect")
 
     def on_start(self):
-        try:
-            self.apply_params()
-            self.ctrl.start()
-        except Exception as e:
-            try:
-                self.ctrl._set_error(f"Start failed: {type(e).__name__}: {e}")
-            except Exception:
-                pass
+        self._post_params()
+        self.ctrl.post("start")
 
     def on_stop(self):
-        try:
-            self.ctrl.stop()
-        except Exception:
-            pass
+        self.ctrl.post("stop")
 
     def on_zero(self):
+        self.ctrl.post("zero")
+
+    def _post_params(self):
         try:
-            self.ctrl.zero_orientation()
-        except Exception as e:
-            try:
-                self.ctrl._set_error(f"Zero failed: {type(e).__name__}: {e}")
-            except Exception:
-                pass
+            self.apply_params()
+        except tk.TclError as e:
+            # ungültige Eingabe in einem Entry (kleiner Hack: Fehlertext in Snapshot)
+            self.ctrl._set_error(f"Invalid parameter: {e}")
 
     # ---- drawing ----
-    def _draw_compass(self, dsp_heading_deg: float, gy_heading_deg: float):
+    def _build_compass(self, w: int, h: int):
+        """Statische Kompass-Items einmal (bzw. bei Größenänderung) anlegen."""
         self.canvas.delete("all")
 
-        w = int(self.canvas.winfo_width())
-        h = int(self.canvas.winfo_height())
         cx, cy = w // 2, h // 2
 
         R = min(w, h) // 2 - 50
@@ -199,14 +199,35 @@ class ArnGui(tk.Tk):
         self.canvas.create_text(cx - R - 18, cy, text="W (270°)", fill="#333")
 
         # kleine Ticks alle 30°
-        for deg in range(0, 360, 30):
-            theta = math.radians(90.0 - deg)
-            x1 = cx + (R - 8) * math.cos(theta)
-            y1 = cy - (R - 8) * math.sin(theta)
-            x2 = cx + R * math.cos(theta)
-            y2 = cy - R * math.sin(theta)
+        for c, s in _TICK_CS:
+            x1 = cx + (R - 8) * c
+            y1 = cy - (R - 8) * s
+            x2 = cx + R * c
+            y2 = cy - R * s
             self.canvas.create_line(x1, y1, x2, y2, fill="#bbb", width=2)
 
+        # bewegliche Items: nur noch per coords()/itemconfigure() aktualisiert
+        # DSP Pfeil (schwarz)
+        self._dsp_arrow_id = self.canvas.create_line(cx, cy, cx, cy - L, arrow=tk.LAST, width=4, fill="black")
+        self._dsp_text_id = self.canvas.create_text(cx, cy - R + 20, text="", fill="black")
+
+        # GYEMS Pfeil (blau)
+        self._gy_arrow_id = self.canvas.create_line(cx, cy, cx, cy - L, arrow=tk.LAST, width=4, fill="blue")
+        self._gy_text_id = self.canvas.create_text(cx, cy - R + 40, text="", fill="blue")
+
+        # Center dot
+        self.canvas.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, fill="#444", outline="")
+
+        self._compass_geom = (w, h, cx, cy, L)
+
+    def _draw_compass(self, dsp_heading_deg: float, gy_heading_deg: float):
+        w = int(self.canvas.winfo_width())
+        h = int(self.canvas.winfo_height())
+
+        if self._compass_geom is None or self._compass_geom[:2] != (w, h):
+            self._build_compass(w, h)
+        _, _, cx, cy, L = self._compass_geom
+
         def end_point(heading_deg: float):
             # heading: 0° = North (up), clockwise positive
             theta = math.radians(90.0 - heading_deg)
@@ -214,49 +235,65 @@ class ArnGui(tk.Tk):
             y = cy - L * math.sin(theta)
             return x, y
 
-        # DSP Pfeil (schwarz)
         x1, y1 = end_point(dsp_heading_deg)
-        self.canvas.create_line(cx, cy, x1, y1, arrow=tk.LAST, width=4, fill="black")
-        self.canvas.create_text(cx, cy - R + 20, text=f"DSP: {dsp_heading_deg:5.1f}°", fill="black")
+        self.canvas.coords(self._dsp_arrow_id, cx, cy, x1, y1)
+        self.canvas.itemconfigure(self._dsp_text_id, text=f"DSP: {dsp_heading_deg:5.1f}°")
 
-        # GYEMS Pfeil (blau)
         x2, y2 = end_point(gy_heading_deg)
-        self.canvas.create_line(cx, cy, x2, y2, arrow=tk.LAST, width=4, fill="blue")
-        self.canvas.create_text(cx, cy - R + 40, text=f"GYEMS: {gy_heading_deg:5.1f}°", fill="blue")
+        self.canvas.coords(self._gy_arrow_id, cx, cy, x2, y2)
+        self.canvas.itemconfigure(self._gy_text_id, text=f"GYEMS: {gy_heading_deg:5.1f}°")
 
-        # Center dot
-        self.canvas.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, fill="#444", outline="")
+    def _set_text(self, key: str, lbl: ttk.Label, text: str):
+        # nur bei Änderung an Tk weiterreichen
+        if self._last.get(key) != text:
+            lbl.config(text=text)
+            self._last[key] = text
 
     def _schedule_update(self):
         snap = self.ctrl.get_snapshot()
 
-        self.lbl_conn.config(text=f"Connected: {snap.connected}")
-        self.lbl_run.config(text=f"Running: {snap.running}")
-        self.lbl_t.config(text=f"t: {snap.t_s:.1f} s")
+        self._set_text("conn", self.lbl_conn, f"Connected: {snap.connected}")
+        self._set_text("run", self.lbl_run, f"Running: {snap.running}")
+        self._set_text("t", self.lbl_t, f"t: {snap.t_s:.1f} s")
+        self._set_text("loop_dt", self.lbl_loop_dt, f"Loop dt: {snap.loop_dt_s * 1000.0:5.1f} ms")
 
-        self.lbl_dsp_rate.config(text=f"DSP rate: {snap.dsp_rate_dps:+.6f} °/s")
-        self.lbl_dsp_dir.config(text=f"DSP Richtung: {snap.dsp_heading_deg:6.1f} °")
+        self._set_text("dsp_rate", self.lbl_dsp_rate, f"DSP rate: {snap.dsp_rate_dps:+.6f} °/s")
+        self._set_text("dsp_dir", self.lbl_dsp_dir, f"DSP Richtung: {snap.dsp_heading_deg:6.1f} °")
 
-        self.lbl_cmd.config(text=f"GYEMS cmd: {snap.cmd_dps:+.2f} °/s")
-        self.lbl_gy_dir.config(text=f"GYEMS Richtung: {snap.gyems_heading_deg:6.1f} °")
-        self.lbl_gy_raw.config(text=f"GYEMS Angle raw: {snap.gyems_angle_deg:6.2f} °")
+        self._set_text("cmd", self.lbl_cmd, f"GYEMS cmd: {snap.cmd_dps:+.2f} °/s")
+        self._set_text("gy_dir", self.lbl_gy_dir, f"GYEMS Richtung: {snap.gyems_heading_deg:6.1f} °")
+        self._set_text("gy_raw", self.lbl_gy_raw, f"GYEMS Angle raw: {snap.gyems_angle_deg:6.2f} °")
 
         st = snap.gyems_status
         if st is None:
-            self.lbl_temp.config(text="Temp: -")
-            self.lbl_iq.config(text="Iq: -")
-            self.lbl_spd.config(text="Speed raw: -")
-            self.lbl_enc.config(text="Encoder: -")
+            self._set_text("temp", self.lbl_temp, "Temp: -")
+            self._set_text("iq", self.lbl_iq, "Iq: -")
+            self._set_text("spd", self.lbl_spd, "Speed raw: -")
+            self._set_text("enc", self.lbl_enc, "Encoder: -")
         else:
-            self.lbl_temp.config(text=f"Temp: {st.temperature_C} °C")
-            self.lbl_iq.config(text=f"Iq: {st.torque_current}")
-            self.lbl_spd.config(text=f"Speed raw: {st.speed_raw}")
-            self.lbl_enc.config(text=f"Encoder: {st.encoder_pos}")
-
-        self.lbl_status.config(text=f"Status ok/to/row: {snap.status_ok} / {snap.status_timeouts} / {snap.status_fail_row}")
-        self.lbl_err.config(text=f"Last error: {snap.last_error or '-'}")
-
-        self._draw_compass(snap.dsp_heading_deg, snap.gyems_heading_deg)
+            self._set_text("temp", self.lbl_temp, f"Temp: {st.temperature_C} °C")
+            self._set_text("iq", self.lbl_iq, f"Iq: {st.torque_current}")
+            self._set_text("spd", self.lbl_spd, f"Speed raw: {st.speed_raw}")
+            self._set_text("enc", self.lbl_enc, f"Encoder: {st.encoder_pos}")
+
+        self._set_text(
+            "status",
+            self.lbl_status,
+            f"Status ok/to/row: {snap.status_ok} / {snap.status_timeouts} / {snap.status_fail_row}"
+            f"  (dt {snap.status_dt_s:.1f} s)",
+        )
+        self._set_text("err", self.lbl_err, f"Last error: {snap.last_error or '-'}")
+
+        # Kompass nur neu zeichnen, wenn sich Richtung (0.1°) oder Canvasgröße geändert hat
+        compass_key = (
+            round(snap.dsp_heading_deg, 1),
+            round(snap.gyems_heading_deg, 1),
+            self.canvas.winfo_width(),
+            self.canvas.winfo_height(),
+        )
+        if compass_key != self._last.get("compass"):
+            self._draw_compass(snap.dsp_heading_deg, snap.gyems_heading_deg)
+            self._last["compass"] = compass_key
 
         self.after(100, self._schedule_update)
 
@@ -0,0 +1,65 @@
+# ARN/arn_math.py
+"""
+Reine Regel-Mathematik des ARN (ohne I/O), damit sie optional mit Numba
+kompiliert werden kann (z.B. für spätere Mehrachs-Varianten).
+
+Numba ist optional: ohne Installation laufen die Funktionen als normales Python.
+"""
+from __future__ import annotations
+
+try:
+    from numba import njit
+except ImportError:  # Numba nicht installiert -> reines Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True, nogil=True)
+def compute_cmd(rate: float, gain: float, deadband: float, max_dps: float) -> float:
+    """
+    P-Regler mit Deadband (Sollrate = 0) und Begrenzung.
+
+    gain = gyro_sign * kp, Ergebnis in °/s, begrenzt auf [-max_dps, +max_dps].
+    """
+    error = -rate
+    if abs(error) < deadband:
+        error = 0.0
+    raw = gain * error
+    if raw < -max_dps:
+        return -max_dps
+    if raw > max_dps:
+        return max_dps
+    return raw
+
+
+@njit(cache=True, nogil=True)
+def pi_step(
+    rate: float,
+    integral: float,
+    dt: float,
+    kp: float,
+    ki: float,
+    max_dps: float,
+    deadband: float,
+    gyro_sign: float,
+) -> tuple[float, float, float]:
+    """
+    Ein PI-Schritt (Sollrate = 0) mit Deadband, Begrenzung und einfachem Anti-Windup
+    (Integral wird in der Begrenzung eingefroren).
+
+    Returns: (speed_cmd, integral, error)
+    """
+    error = gyro_sign * -rate
+    if abs(error) < deadband:
+        error = 0.0
+    integral += error * dt
+    raw = kp * error + ki * integral
+    if raw >= max_dps:
+        raw = max_dps
+        integral -= error * dt
+    elif raw <= -max_dps:
+        raw = -max_dps
+        integral -= error * dt
+    return raw, integral, error
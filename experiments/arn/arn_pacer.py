@@ -0,0 +1,99 @@
+# ARN/arn_pacer.py
+"""
+Periodischer Takt für die ARN-Regelkreise (absolute Deadlines, driftfrei).
+
+- Linux + Python >= 3.13: Kernel-Timer über os.timerfd_create(CLOCK_MONOTONIC);
+  os.read() blockiert bis zur nächsten Periodengrenze, kein Busy-Wait.
+- sonst: time.sleep bis kurz vor die Deadline, Rest per Busy-Wait.
+  (Ab Python 3.11 nutzt time.sleep unter Windows selbst einen High-Resolution
+  Waitable Timer, dort reicht ein kleiner SPIN_MARGIN_S.)
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+
+SPIN_MARGIN_S = 0.0015
+
+
+def sleep_until(deadline: float, spin_margin_s: float = SPIN_MARGIN_S) -> None:
+    """Bis deadline (time.monotonic) schlafen, die letzten spin_margin_s aktiv warten."""
+    remaining = deadline - time.monotonic()
+    if remaining > spin_margin_s:
+        time.sleep(remaining - spin_margin_s)
+    while time.monotonic() < deadline:
+        pass
+
+
+def set_windows_timer_resolution(enable: bool) -> None:
+    """Windows: System-Timer auf 1 ms (timeBeginPeriod/timeEndPeriod), sonst no-op."""
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+
+        winmm = ctypes.windll.winmm
+        if enable:
+            winmm.timeBeginPeriod(1)
+        else:
+            winmm.timeEndPeriod(1)
+    except (OSError, AttributeError):
+        pass
+
+
+class Pacer:
+    """
+    Taktgeber mit fester Periode.
+
+    wait() blockiert bis zur nächsten Periodengrenze und liefert die Anzahl der
+    seit dem letzten wait() abgelaufenen Perioden (1 = im Takt, >1 = Overrun,
+    verpasste Ticks werden nicht nachgeholt).
+    """
+
+    def __init__(self, period_s: float, spin_margin_s: float = SPIN_MARGIN_S):
+        self.period_s = float(period_s)
+        self.spin_margin_s = float(spin_margin_s)
+        self._tfd: int | None = None
+        self._next = 0.0
+
+    @property
+    def uses_timerfd(self) -> bool:
+        return self._tfd is not None
+
+    def start(self) -> None:
+        """Takt ab jetzt; erste Periodengrenze = jetzt + period_s."""
+        self.close()
+        if sys.platform.startswith("linux") and hasattr(os, "timerfd_create"):
+            try:
+                tfd = os.timerfd_create(time.CLOCK_MONOTONIC)
+                os.timerfd_settime(tfd, initial=self.period_s, interval=self.period_s)
+                self._tfd = tfd
+                return
+            except OSError:
+                self._tfd = None
+        self._next = time.monotonic() + self.period_s
+
+    def wait(self) -> int:
+        tfd = self._tfd
+        if tfd is not None:
+            # 8 Byte uint64: Anzahl Expirations seit dem letzten read
+            return struct.unpack("=Q", os.read(tfd, 8))[0]
+
+        now = time.monotonic()
+        if now < self._next:
+            sleep_until(self._next, self.spin_margin_s)
+            self._next += self.period_s
+            return 1
+        # Deadline schon vorbei: sofort zurück (wie timerfd), Raster beibehalten
+        missed = int((now - self._next) // self.period_s) + 1
+        self._next += missed * self.period_s
+        return missed
+
+    def close(self) -> None:
+        if self._tfd is not None:
+            try:
+                os.close(self._tfd)
+            finally:
+                self._tfd = None
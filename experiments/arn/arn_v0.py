@@ -16,6 +16,7 @@ DSP_PORT   = "COM3"
 # =====================
 LOOP_HZ = 10.0
 DT = 1.0 / LOOP_HZ
+PRINT_INTERVAL = 0.2  # s, Debug-Ausgabe max 5 Hz
 
 MAX_DPS = 180.0      # 0.5 U/s
 K_GYRO  = 1.0        # Verstärkung
@@ -70,11 +71,12 @@ def main():
     # 4) REGELKREIS (10 Hz)
     # -----------------
     print("Starte Regelkreis (Ctrl+C zum Abbruch)")
-    t_last = time.time()
+    t_last = time.monotonic()
+    last_print = t_last
 
     try:
         while True:
-            t_now = time.time()
+            t_now = time.monotonic()
             dt = t_now - t_last
             t_last = t_now
 
@@ -90,15 +92,17 @@ def main():
             # d) An GYEMS senden
             gyems.set_speed_deg_s(speed_cmd)
 
-            # Debug-Ausgabe
-            print(
-                f"\rDSP rate: {rate_dps:+7.2f} °/s | "
-                f"GYEMS cmd: {speed_cmd:+7.2f} °/s",
-                end=""
-            )
+            # Debug-Ausgabe max 5 Hz, damit Console nicht bremst
+            if t_now - last_print >= PRINT_INTERVAL:
+                print(
+                    f"\rDSP rate: {rate_dps:+7.2f} °/s | "
+                    f"GYEMS cmd: {speed_cmd:+7.2f} °/s",
+                    end=""
+                )
+                last_print = t_now
 
             # 10 Hz halten
-            sleep_time = DT - (time.time() - t_now)
+            sleep_time = DT - (time.monotonic() - t_now)
             if sleep_time > 0:
                 time.sleep(sleep_time)
 
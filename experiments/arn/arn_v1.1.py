@@ -16,6 +16,7 @@ DSP_PORT   = "COM3"
 # =====================
 LOOP_HZ = 10.0
 DT = 1.0 / LOOP_HZ
+PRINT_INTERVAL = 0.2  # s, Debug-Ausgabe max 5 Hz
 
 MAX_DPS = 180.0      # 0.5 U/s
 
@@ -77,11 +78,12 @@ def main():
     # 4) REGELKREIS (P)
     # -----------------
     print("Starte Regelkreis (P + Deadband, Ctrl+C zum Abbruch)")
-    t_last = time.time()
+    t_last = time.monotonic()
+    last_print = t_last
 
     try:
         while True:
-            t_now = time.time()
+            t_now = time.monotonic()
             dt = t_now - t_last
             t_last = t_now
 
@@ -104,16 +106,18 @@ def main():
             # f) An Motor senden
             gyems.set_speed_deg_s(speed_cmd)
 
-            # Debug
-            print(
-                f"\rω_gyro: {rate_dps:+7.3f} °/s | "
-                f"e: {error:+7.3f} | "
-                f"cmd: {speed_cmd:+7.2f}",
-                end=""
-            )
+            # Debug max 5 Hz, damit Console nicht bremst
+            if t_now - last_print >= PRINT_INTERVAL:
+                print(
+                    f"\rω_gyro: {rate_dps:+7.3f} °/s | "
+                    f"e: {error:+7.3f} | "
+                    f"cmd: {speed_cmd:+7.2f}",
+                    end=""
+                )
+                last_print = t_now
 
             # 10 Hz halten
-            sleep_time = DT - (time.time() - t_now)
+            sleep_time = DT - (time.monotonic() - t_now)
             if sleep_time > 0:
                 time.sleep(sleep_time)
 
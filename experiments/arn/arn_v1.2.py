@@ -59,11 +59,11 @@ def main():
 
     print("Starte Regelkreis (Ctrl+C zum Abbruch)")
     consecutive_timeouts = 0
-    last_print = time.time()
+    last_print = time.monotonic()
 
     try:
         while True:
-            t0 = time.time()
+            t0 = time.monotonic()
 
             rate_dps = dsp.rate_dps
             error = GYRO_SIGN * (-rate_dps)
@@ -81,7 +81,7 @@ def main():
 
                 # best-effort stop (ohne reply ist das nicht garantiert, aber versuchen)
                 try:
-                    gyems.ser.reset_input_buffer()  # flush junk if possible
+                    gyems.reset_input_buffer()  # flush junk if possible
                 except Exception:
                     pass
 
@@ -104,15 +104,15 @@ def main():
                 consecutive_timeouts = 0
 
             # Debug-Ausgabe max 5 Hz, damit Console nicht bremst
-            if time.time() - last_print >= 0.2:
+            if time.monotonic() - last_print >= 0.2:
                 print(
                     f"\rω_gyro: {rate_dps:+7.3f} °/s | e: {error:+7.3f} | cmd: {speed_cmd:+7.2f}  ",
                     end=""
                 )
-                last_print = time.time()
+                last_print = time.monotonic()
 
             # Loop timing
-            dt_sleep = DT - (time.time() - t0)
+            dt_sleep = DT - (time.monotonic() - t0)
             if dt_sleep > 0:
                 time.sleep(dt_sleep)
 
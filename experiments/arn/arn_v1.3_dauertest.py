@@ -1,8 +1,23 @@
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
 import time
 
+import serial
+
 from GYEMS.gyems_rs485 import GyemsRmdRs485
 from KVH_DSP_3100.dsp3100 import DSP3100
 
+try:
+    from .arn_math import pi_step
+    from .arn_pacer import Pacer, set_windows_timer_resolution, sleep_until
+except ImportError:
+    from arn_math import pi_step
+    from arn_pacer import Pacer, set_windows_timer_resolution, sleep_until
+
 GYEMS_PORT = "COM4"
 DSP_PORT   = "COM3"
 
@@ -14,39 +29,195 @@ K_P = 1.0
 DEADBAND_DPS = 0.05
 GYRO_SIGN = -1.0
 
+# Status-Abfrage mit ACK (Speed-Kommandos laufen TX-only @ LOOP_HZ)
+STATUS_HZ = 1.0
+STATUS_DT = 1.0 / STATUS_HZ
+
+# DSP-Sample älter als DSP_STALE_S -> Motor-Kommando 0 (Lesethread hängt / Kabel ab)
+DSP_STALE_S = 0.5
+
+# Speed-Kommando nur senden bei Änderung > CMD_EPS_DPS, sonst als Keepalive alle CMD_KEEPALIVE_S
+CMD_EPS_DPS = 0.1
+CMD_KEEPALIVE_S = 0.5
+
+# GYEMS Serial-Timeout: aus Framegröße/Baudrate statt pauschal 250 ms.
+# Status-Antwort = 5 Byte Header + 7 Byte Daten + 1 Byte Checksumme; die Untergrenze
+# deckt USB-Latenz (FTDI latency_timer 1 ms) und Verarbeitungszeit im Motor ab.
+# Nur wenn der latency_timer wirklich gesetzt wurde (Linux/sysfs)! Sonst (z.B. Windows)
+# bleibt der FTDI-Default 16 ms, dann gilt die großzügigere Untergrenze.
+GYEMS_BAUDRATE = 115200
+GYEMS_STATUS_RX_BYTES = 13
+GYEMS_TIMEOUT_FLOOR_S = 0.02
+GYEMS_TIMEOUT_FLOOR_DEFAULT_LATENCY_S = 0.05
+
 # Robustheit
 MAX_CONSEC_TIMEOUTS = 5
 RECONNECT_ON_TIMEOUT = True
+RECONNECT_AFTER_TIMEOUTS = 3   # vorher nur RX-Resync, erst ab hier close/connect
+RECONNECT_BACKOFF_MIN_S = 0.05
+RECONNECT_BACKOFF_MAX_S = 2.0
+
+# Warm-up vor dem Regelkreis: Zyklen mit cmd 0 im Loop-Takt (nicht in der Statistik)
+WARMUP_CYCLES = 20
 
 # Statistik
 WINDOW_S = 30.0  # alle 30s Statistik ausgeben
 
+# Live-Zeile: max. 5 Hz schreiben, nur jede n-te Zeile flushen
+PRINT_INTERVAL = 0.2
+PRINT_FLUSH_EVERY = 5
+
+log = logging.getLogger("arn_v1.3")
+
+# Echtzeit-Setup für den Regel-Thread (braucht Admin / CAP_SYS_NICE + CAP_IPC_LOCK)
+RT_PRIORITY = 80      # Linux SCHED_FIFO
+CONTROL_CPU = 2       # Kern für den Regelkreis (None = nicht pinnen)
 
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
 
+class GyemsSupervisor:
+    """
+    Besitzt die GYEMS-Verbindung für den Regelkreis: TX-only senden und Reconnect
+    im Hintergrund mit exponentiellem Backoff (RECONNECT_BACKOFF_MIN_S .. _MAX_S).
+
+    Der Regelkreis blockiert nie: während recovering gesetzt ist, fasst er GYEMS
+    nicht an und läuft mit DSP/Statistik im Takt weiter.
+    """
+
+    def __init__(self, gyems: GyemsRmdRs485):
+        self.gyems = gyems
+        self.attempts_failed = 0
+        self._recovering = threading.Event()
+        self._request = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def recovering(self) -> bool:
+        return self._recovering.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return not self._recovering.is_set() and self.gyems.is_connected()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._request.set()
+        self._thread.join(timeout=1.0)
+
+    def tx(self, speed_dps: float) -> bool:
+        """TX-only Kommando; bei Schreibfehler Reconnect anstoßen statt den Loop abzubrechen."""
+        if not self.ready:
+            return False
+        try:
+            self.gyems.set_speed_deg_s_tx_only(speed_dps)
+            return True
+        except Exception as e:
+            log.error("GYEMS TX failed: %s -> reconnect", e)
+            self.recover()
+            return False
+
+    def recover(self) -> None:
+        if not self._recovering.is_set():
+            self.attempts_failed = 0
+            self._recovering.set()
+            self._request.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._request.wait()
+            self._request.clear()
+            backoff = RECONNECT_BACKOFF_MIN_S
+            # bis verbunden (oder Stop) wiederholen, Pause verdoppeln bis _MAX_S
+            while self._recovering.is_set() and not self._stop.is_set():
+                try:
+                    self.gyems.close()
+                except Exception:
+                    pass
+                if self._stop.wait(backoff):
+                    break
+                try:
+                    self.gyems.connect()
+                    log.info("GYEMS reconnected (after %d failed attempts)", self.attempts_failed)
+                    self._recovering.clear()
+                except Exception as e:
+                    self.attempts_failed += 1
+                    backoff = min(backoff * 2.0, RECONNECT_BACKOFF_MAX_S)
+                    log.error("reconnect failed (#%d, next in %.2f s): %s", self.attempts_failed, backoff, e)
+
+
+def raise_realtime_priority() -> None:
+    """
+    Best effort: hohe Priorität + CPU-Pinning für den aufrufenden Thread.
+      - Windows: HIGH_PRIORITY_CLASS für den Prozess, Thread-Affinität auf CONTROL_CPU
+      - Linux: SCHED_FIFO(RT_PRIORITY), sched_setaffinity, mlockall gegen Page-Fault-Stalls
+    Fehlende Rechte werden nur gemeldet.
+    """
+    if sys.platform == "win32":
+        try:
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), 0x00000080)  # HIGH_PRIORITY_CLASS
+            if CONTROL_CPU is not None:
+                kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << CONTROL_CPU)
+        except (OSError, AttributeError) as e:
+            print("[WARN] Priorität/Affinität nicht gesetzt:", e)
+        return
 
-def safe_set_speed(gyems: GyemsRmdRs485, speed_cmd: float) -> bool:
     try:
-        gyems.set_speed_deg_s(speed_cmd)
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(RT_PRIORITY))
+    except (OSError, AttributeError) as e:
+        print("[WARN] SCHED_FIFO nicht gesetzt:", e)
+    if CONTROL_CPU is not None:
+        try:
+            os.sched_setaffinity(0, {CONTROL_CPU})
+        except (OSError, AttributeError, ValueError) as e:
+            print("[WARN] CPU-Affinität nicht gesetzt:", e)
+    try:
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mlockall(3) != 0:  # MCL_CURRENT | MCL_FUTURE
+            print("[WARN] mlockall fehlgeschlagen, errno", ctypes.get_errno())
+    except (OSError, AttributeError) as e:
+        print("[WARN] mlockall nicht verfügbar:", e)
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """WARN/INFO/STATS über Queue + Listener-Thread, damit der Regelkreis nie auf die Console wartet."""
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("\n[%(levelname)s] %(message)s"))
+    listener = logging.handlers.QueueListener(q, handler)
+    log.addHandler(logging.handlers.QueueHandler(q))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener.start()
+    return listener
+
+
+def safe_read_status(gyems: GyemsRmdRs485, supervisor: GyemsSupervisor) -> bool:
+    """
+    Status-Read mit ACK. Timeout -> False (Zählung/Resync im Regelkreis).
+    Verbindungsfehler (USB ab, Port vom Supervisor gerade geschlossen) -> Reconnect anstoßen, False.
+    """
+    try:
+        # Antworten auf die TX-only Kommandos verwerfen, sonst liest read_status() diese
+        gyems.drain_rx()
+        gyems.read_status()
         return True
     except TimeoutError:
         return False
+    except (OSError, serial.SerialException, RuntimeError) as e:
+        log.error("GYEMS status read failed: %s -> reconnect", e)
+        supervisor.recover()
+        return False
 
 
-def main():
-    print("=== ARN v1.3 (P + Deadband + Timeout-Stats) Start ===")
-
-    dsp = DSP3100()
-    dsp.connect(port=DSP_PORT, baudrate=375000)
-    print("DSP3100 läuft")
-    time.sleep(1.0)
-
-    gyems = GyemsRmdRs485(port=GYEMS_PORT, motor_id=0x01, baudrate=115200, timeout=0.25)
-    gyems.connect()
-    print("GYEMS verbunden")
-
-    # Testfahrt
+def testfahrt(gyems: GyemsRmdRs485) -> None:
     print("Testfahrt: 2s rechts")
     gyems.set_speed_deg_s(+90.0)
     time.sleep(2.0)
@@ -57,87 +228,185 @@ def main():
     gyems.set_speed_deg_s(0.0)
     time.sleep(1.0)
 
+
+def warm_up(dsp: DSP3100, gyems: GyemsRmdRs485, supervisor: GyemsSupervisor,
+            cycles: int = WARMUP_CYCLES) -> None:
+    """
+    Den Loop-Pfad einmal "kalt" durchlaufen, bevor Timing/Timeouts gezählt werden:
+    pi_step (ggf. JIT), TX-only Pfad + USB/FTDI, Pacing mit erhöhter Timer-Auflösung,
+    abschließend ein Status-Read inkl. RX-Drain.
+    """
+    tx_only = gyems.set_speed_deg_s_tx_only
+    deadline = time.monotonic()
+    for _ in range(cycles):
+        pi_step(dsp.rate_dps, 0.0, DT, K_P, 0.0, MAX_DPS, DEADBAND_DPS, GYRO_SIGN)
+        tx_only(0.0)
+        deadline += DT
+        sleep_until(deadline)
+    safe_read_status(gyems, supervisor)
+
+
+def main():
+    print("=== ARN v1.3 (P + Deadband + Timeout-Stats, TX-only @10Hz, Status@1Hz) Start ===")
+    log_listener = setup_logging()
+    set_windows_timer_resolution(True)
+
+    dsp = DSP3100()
+    dsp.connect(port=DSP_PORT, baudrate=375000)
+    print("DSP3100 läuft")
+    time.sleep(1.0)
+
+    if GyemsRmdRs485.set_ftdi_latency_timer(GYEMS_PORT, 1):
+        print("FTDI latency_timer = 1 ms")
+        timeout_floor = GYEMS_TIMEOUT_FLOOR_S
+    else:
+        timeout_floor = GYEMS_TIMEOUT_FLOOR_DEFAULT_LATENCY_S
+    gyems_timeout = GyemsRmdRs485.min_timeout_s(
+        GYEMS_BAUDRATE, GYEMS_STATUS_RX_BYTES, floor_s=timeout_floor
+    )
+    gyems = GyemsRmdRs485(port=GYEMS_PORT, motor_id=0x01, baudrate=GYEMS_BAUDRATE, timeout=gyems_timeout)
+    gyems.connect()
+    print(f"GYEMS verbunden (timeout={gyems_timeout * 1000.0:.0f} ms)")
+
+    testfahrt(gyems)
+
+    # vor raise_realtime_priority(): der Reconnect-Thread soll SCHED_FIFO/CONTROL_CPU nicht erben
+    supervisor = GyemsSupervisor(gyems)
+    supervisor.start()
+
+    # erst nach dsp.connect(): der DSP-Lesethread soll die RT-Einstellungen nicht erben
+    raise_realtime_priority()
+
+    print(f"Warm-up ({WARMUP_CYCLES} Zyklen, cmd 0)")
+    warm_up(dsp, gyems, supervisor)
+
     print("Starte Regelkreis (Ctrl+C zum Abbruch)")
 
     consecutive_timeouts = 0
     timeouts_total = 0
 
-    window_start = time.time()
+    window_start = time.monotonic()
     timeouts_window = 0
 
-    last_print = time.time()
+    last_print = time.monotonic()
+    print_count = 0
+    next_status = time.monotonic() + STATUS_DT
+
+    last_cmd = None
+    last_tx = 0.0
+    dsp_stale = False
+
+    # Lookups für den Regelkreis einmal binden (LOAD_FAST statt Attribut-/Global-Lookup)
+    monotonic = time.monotonic
+    tx = supervisor.tx
+    stdout_write = sys.stdout.write
+
+    # Takt: Kernel-Timer (timerfd) falls verfügbar, sonst absolute Deadline + Busy-Wait-Rest
+    pacer = Pacer(DT)
+    pacer.start()
 
     try:
         while True:
-            t0 = time.time()
-
             # --- Regelung ---
             rate_dps = dsp.rate_dps
-            error = GYRO_SIGN * (-rate_dps)
-
-            if abs(error) < DEADBAND_DPS:
-                error = 0.0
-
-            speed_cmd = clamp(K_P * error, -MAX_DPS, +MAX_DPS)
-
-            ok = safe_set_speed(gyems, speed_cmd)
+            speed_cmd, _, error = pi_step(
+                rate_dps, 0.0, DT, K_P, 0.0, MAX_DPS, DEADBAND_DPS, GYRO_SIGN
+            )
+
+            # rate_dps kommt aus dem DSP-Lesethread; nur frische Samples verwenden
+            if monotonic() - dsp.rate_t > DSP_STALE_S:
+                if not dsp_stale:
+                    log.warning("DSP sample stale (> %.1f s) -> cmd 0", DSP_STALE_S)
+                dsp_stale = True
+                speed_cmd = 0.0
+            else:
+                dsp_stale = False
+
+            # GYEMS gehört während eines Reconnects dem Supervisor-Thread
+            gy_ready = supervisor.ready
+
+            # --- TX-only (kein ACK-Warten im 10-Hz-Pfad), unveränderte Kommandos zusammenfassen ---
+            t_tx = monotonic()
+            if gy_ready and (
+                last_cmd is None or abs(speed_cmd - last_cmd) > CMD_EPS_DPS or t_tx - last_tx >= CMD_KEEPALIVE_S
+            ):
+                if tx(speed_cmd):
+                    last_cmd = speed_cmd
+                    last_tx = t_tx
+
+            # --- Status @STATUS_HZ (ACK): nur hier sind Timeouts beobachtbar ---
+            ok = None
+            if monotonic() >= next_status:
+                next_status += STATUS_DT
+                # erneut prüfen: tx() kann in diesem Tick recover() angestoßen haben
+                if supervisor.ready:
+                    ok = safe_read_status(gyems, supervisor)
+                elif supervisor.attempts_failed:
+                    # Reconnect schlägt weiter fehl -> wie Timeout zählen (Watchdog)
+                    ok = False
 
             # --- Timeout Handling + Stats ---
-            if not ok:
+            if ok is False:
                 consecutive_timeouts += 1
                 timeouts_total += 1
                 timeouts_window += 1
 
-                print(f"\n[WARN] GYEMS timeout #{timeouts_total} (consec={consecutive_timeouts})")
-
-                # flush input (best effort)
-                try:
-                    gyems.ser.reset_input_buffer()
-                except Exception:
-                    pass
+                log.warning("GYEMS timeout #%d (consec=%d)", timeouts_total, consecutive_timeouts)
 
-                if RECONNECT_ON_TIMEOUT:
+                if supervisor.recovering:
+                    pass  # Reconnect mit Backoff läuft bereits
+                elif supervisor.ready and consecutive_timeouts < RECONNECT_AFTER_TIMEOUTS:
+                    # leichter Resync ohne close/open: RX leeren (ohne Sleep), Kommando sofort neu senden
                     try:
-                        gyems.close()
+                        gyems.drain_rx()
+                    except Exception as e:
+                        log.error("resync failed: %s", e)
+                    if tx(speed_cmd):
+                        last_cmd = speed_cmd
+                        last_tx = monotonic()
+                elif RECONNECT_ON_TIMEOUT:
+                    # blockierender Reconnect im Hintergrund, Regelkreis läuft im Takt weiter
+                    supervisor.recover()
+                    last_cmd = None  # nach Reconnect sofort neu senden
+                else:
+                    # flush input (best effort)
+                    try:
+                        gyems.reset_input_buffer()
                     except Exception:
                         pass
-                    try:
-                        time.sleep(0.2)
-                        gyems.connect()
-                        print("[INFO] GYEMS reconnected")
-                    except Exception as e:
-                        print("[ERROR] reconnect failed:", e)
 
                 if consecutive_timeouts >= MAX_CONSEC_TIMEOUTS:
                     raise RuntimeError("Zu viele Timeouts hintereinander -> Stop")
 
-            else:
+            elif ok:
                 consecutive_timeouts = 0
 
             # --- Statistik-Fenster ---
-            now = time.time()
+            now = monotonic()
             if now - window_start >= WINDOW_S:
                 elapsed = now - window_start
                 per_min = (timeouts_window / elapsed) * 60.0 if elapsed > 0 else 0.0
-                print(
-                    f"\n[STATS] Window={elapsed:.1f}s | timeouts={timeouts_window} | "
-                    f"{per_min:.2f} / min | total={timeouts_total}"
+                log.info(
+                    "STATS Window=%.1fs | timeouts=%d | %.2f / min | total=%d",
+                    elapsed, timeouts_window, per_min, timeouts_total,
                 )
                 window_start = now
                 timeouts_window = 0
 
             # --- Debug-Ausgabe (max 5 Hz) ---
-            if now - last_print >= 0.2:
-                print(
-                    f"\rω_gyro: {rate_dps:+7.3f} °/s | e: {error:+7.3f} | cmd: {speed_cmd:+7.2f}  ",
-                    end=""
+            if now - last_print >= PRINT_INTERVAL:
+                stdout_write(
+                    f"\rω_gyro: {rate_dps:+7.3f} °/s | e: {error:+7.3f} | cmd: {speed_cmd:+7.2f}  "
                 )
+                print_count += 1
+                if print_count % PRINT_FLUSH_EVERY == 0:
+                    sys.stdout.flush()
                 last_print = now
 
-            # --- Loop timing ---
-            dt_sleep = DT - (time.time() - t0)
-            if dt_sleep > 0:
-                time.sleep(dt_sleep)
+            # --- Loop timing (feste Periodengrenzen, driftfrei; verpasste Ticks nicht nachholen) ---
+            ticks = pacer.wait()
+            if ticks > 1:
+                log.warning("Loop overrun -> %d Tick(s) übersprungen", ticks - 1)
 
     except KeyboardInterrupt:
         print("\nAbbruch durch Benutzer")
@@ -146,7 +415,9 @@ def main():
         print("\n[ERROR]", e)
 
     finally:
+        pacer.close()
         print("\nStoppe Motor & schließe Verbindungen")
+        supervisor.stop()
         try:
             for _ in range(3):
                 try:
@@ -166,6 +437,10 @@ def main():
         except Exception:
             pass
 
+        set_windows_timer_resolution(False)
+
+        log_listener.stop()
+
         print(f"Timeouts total: {timeouts_total}")
         print("=== ARN v1.3 Ende ===")
 
@@ -4,6 +4,13 @@ import time
 from GYEMS.gyems_rs485 import GyemsRmdRs485
 from KVH_DSP_3100.dsp3100 import DSP3100
 
+try:
+    from .arn_math import pi_step
+    from .arn_pacer import Pacer
+except ImportError:
+    from arn_math import pi_step
+    from arn_pacer import Pacer
+
 
 # =====================
 # FESTE PORT-ZUORDNUNG
@@ -29,10 +36,6 @@ K_I = 0.3            # integral
 GYRO_SIGN = -1.0     # <<< DAS ist die Korrektur
 
 
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
-
-
 def main():
     print("=== ARN v1 (PI-Regler) Start ===")
 
@@ -78,30 +81,24 @@ def main():
     print("Starte PI-Regelkreis (Ctrl+C zum Abbruch)")
 
     integral = 0.0
-    t_last = time.time()
+    pi_step(0.0, 0.0, DT, K_P, K_I, MAX_DPS, 0.0, GYRO_SIGN)  # Warm-up (ggf. JIT-Kompilierung)
+    t_last = time.monotonic()
+    pacer = Pacer(DT)
+    pacer.start()
 
     try:
         while True:
-            t_now = time.time()
+            t_now = time.monotonic()
             dt = t_now - t_last
             t_last = t_now
 
             # a) Gyro-Rate
             rate_dps = dsp.rate_dps
 
-            # b) Regelfehler (Soll = 0)
-            error = GYRO_SIGN * (-rate_dps)
-
-            # c) PI-Regler
-            integral += error * dt
-
-            speed_cmd = K_P * error + K_I * integral
-
-            # d) Begrenzen + Anti-Windup
-            speed_cmd = clamp(speed_cmd, -MAX_DPS, +MAX_DPS)
-            if abs(speed_cmd) >= MAX_DPS:
-                # Integral einfrieren (sehr einfache Anti-Windup-Strategie)
-                integral -= error * dt
+            # b)-d) PI-Schritt (Soll = 0) inkl. Begrenzung + Anti-Windup
+            speed_cmd, integral, error = pi_step(
+                rate_dps, integral, dt, K_P, K_I, MAX_DPS, 0.0, GYRO_SIGN
+            )
 
             # e) An Motor senden
             gyems.set_speed_deg_s(speed_cmd)
@@ -114,15 +111,16 @@ def main():
                 end=""
             )
 
-            # 10 Hz halten
-            sleep_time = DT - (time.time() - t_now)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            # 10 Hz halten (feste Periodengrenzen, driftfrei; verpasste Ticks nicht nachholen)
+            ticks = pacer.wait()
+            if ticks > 1:
+                print(f"\n[WARN] Loop overrun -> {ticks - 1} Tick(s) übersprungen")
 
     except KeyboardInterrupt:
         print("\nAbbruch durch Benutzer")
 
     finally:
+        pacer.close()
         print("Stoppe Motor & schließe Verbindungen")
         try:
             gyems.set_speed_deg_s(0.0)
@@ -1,4 +1,5 @@
-import csv
+import queue
+import threading
 import time
 import math
 from datetime import datetime
@@ -6,6 +7,13 @@ from datetime import datetime
 from GYEMS.gyems_rs485 import GyemsRmdRs485
 from KVH_DSP_3100.dsp3100 import DSP3100
 
+try:
+    from .arn_math import pi_step
+    from .arn_pacer import Pacer, set_windows_timer_resolution
+except ImportError:
+    from arn_math import pi_step
+    from arn_pacer import Pacer, set_windows_timer_resolution
+
 # =====================
 # FESTE PORTS
 # =====================
@@ -28,11 +36,37 @@ GYRO_SIGN = -1.0              # bei dir: Vorzeichen umgedreht
 # Watchdog für Statusabfragen
 MAX_STATUS_TIMEOUTS_IN_ROW = 3
 
+# CSV: Rohwerte sammeln, einmal pro Sekunde formatieren + schreiben
+CSV_BATCH_ROWS = int(LOOP_HZ)
+CSV_BUFFER_BYTES = 1 << 16
+# flush() (= write-Syscall) nur alle CSV_FLUSH_S oder sofort nach einem Status-Fehler,
+# dazwischen sammelt der 64-KiB-Dateipuffer die Blöcke
+CSV_FLUSH_S = 10.0
+CSV_HEADER = (
+    "t_s;gyro_rate_dps;error_dps;speed_cmd_dps;"
+    "status_event;status_temp_C;status_speed_raw;status_enc\n"
+)
+CSV_ROW_FMT = "%.3f;%.6f;%.6f;%.3f;%s;%s;%s;%s\n"
+
 CSV_FILE = f"arn_dauertest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
 
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
+def status_worker(gy: GyemsRmdRs485, stop_evt: threading.Event, results: queue.SimpleQueue) -> None:
+    """
+    Status-Abfrage @STATUS_HZ (ACK) in eigenem Thread, damit ein blockierendes
+    read_status() (Timeout + Retries) den 10-Hz-Regelkreis nicht aufhält.
+    Ergebnisse: (status_event, GyemsStatus | None) in results.
+    """
+    status_dt = 1.0 / STATUS_HZ
+    next_status = time.monotonic()
+    while not stop_evt.wait(timeout=max(0.0, next_status - time.monotonic())):
+        next_status += status_dt
+        try:
+            results.put(("ok", gy.read_status()))
+        except TimeoutError:
+            results.put(("timeout", None))
+        except Exception as e:
+            results.put((f"err:{type(e).__name__}", None))
 
 
 def main():
@@ -40,6 +74,7 @@ def main():
     print(f"GYEMS={GYEMS_PORT}, DSP={DSP_PORT}")
     print(f"Dauer={DURATION_S/60:.1f} min, Loop={LOOP_HZ}Hz, Status={STATUS_HZ}Hz")
     print("CSV:", CSV_FILE)
+    set_windows_timer_resolution(True)
 
     # --- DSP ---
     dsp = DSP3100()
@@ -60,98 +95,101 @@ def main():
     other_errors = 0
 
     # window stats
-    win_start = time.time()
+    win_start = time.monotonic()
     win_status_timeouts = 0
     win_other_errors = 0
 
     # scheduling
     dt = 1.0 / LOOP_HZ
-    status_dt = 1.0 / STATUS_HZ
-    next_status = time.time()
-
-    t0 = time.time()
-    next_tick = t0
-
-    with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f, delimiter=";")
-        w.writerow([
-            "t_s",
-            "gyro_rate_dps",
-            "error_dps",
-            "speed_cmd_dps",
-            "status_event",
-            "status_temp_C",
-            "status_speed_raw",
-            "status_enc",
-        ])
 
+    # status thread (ACK-I/O außerhalb des Regelkreises)
+    status_results: queue.SimpleQueue = queue.SimpleQueue()
+    status_stop = threading.Event()
+    status_thread = threading.Thread(
+        target=status_worker, args=(gy, status_stop, status_results), daemon=True
+    )
+
+    t0 = time.monotonic()
+    pacer = Pacer(dt)
+
+    rows_buf = []
+    last_flush = t0
+    flush_now = False
+
+    with open(CSV_FILE, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_BYTES) as f:
+        write = f.write
+        write(CSV_HEADER)
+
+        # Lookups für den Regelkreis einmal binden (LOAD_FAST statt Attribut-/Global-Lookup)
+        monotonic = time.monotonic
+        tx_only = gy.set_speed_deg_s_tx_only
+        get_status = status_results.get_nowait
+        append_row = rows_buf.append
+        pi_step(0.0, 0.0, dt, K_P, 0.0, MAX_DPS, DEADBAND_DPS, GYRO_SIGN)  # Warm-up (ggf. JIT-Kompilierung)
+
+        status_thread.start()
+        pacer.start()
         try:
             while True:
-                now = time.time()
+                # --- 10 Hz pacing (timerfd bzw. sleep + kurzer Busy-Wait-Rest) ---
+                pacer.wait()
+
+                now = monotonic()
                 t = now - t0
                 if t >= DURATION_S:
                     print("\nReached duration.")
                     break
-
-                # --- 10 Hz pacing ---
-                if now < next_tick:
-                    time.sleep(min(0.01, next_tick - now))
-                    continue
-                next_tick += dt
                 loops += 1
 
                 # --- control (P + deadband) ---
                 rate = dsp.rate_dps
-                error = GYRO_SIGN * (-rate)
-                if abs(error) < DEADBAND_DPS:
-                    error = 0.0
-
-                speed_cmd = clamp(K_P * error, -MAX_DPS, +MAX_DPS)
+                speed_cmd, _, error = pi_step(
+                    rate, 0.0, dt, K_P, 0.0, MAX_DPS, DEADBAND_DPS, GYRO_SIGN
+                )
 
                 # --- TX-only command (no ACK) ---
-                gy.set_speed_deg_s_tx_only(speed_cmd)
+                tx_only(speed_cmd)
                 speed_cmd_sent += 1
 
-                # --- status check @1Hz (ACK) ---
+                # --- status result from status thread (non-blocking) ---
                 status_event = ""
                 st_temp = ""
                 st_spd = ""
                 st_enc = ""
 
-                if now >= next_status:
-                    next_status += status_dt
-                    try:
-                        st = gy.read_status()
+                try:
+                    status_event, st = get_status()
+                except queue.Empty:
+                    pass
+                else:
+                    if status_event == "ok":
                         status_ok += 1
                         status_timeouts_row = 0
-                        status_event = "ok"
                         if st:
                             st_temp = st.temperature_C
                             st_spd = st.speed_raw
                             st_enc = st.encoder_pos
-                    except TimeoutError:
+                    elif status_event == "timeout":
                         status_timeouts_total += 1
                         win_status_timeouts += 1
                         status_timeouts_row += 1
-                        status_event = "timeout"
                         if status_timeouts_row >= MAX_STATUS_TIMEOUTS_IN_ROW:
                             raise RuntimeError("Status watchdog: zu viele Timeouts in Folge")
-                    except Exception as e:
+                    else:
                         other_errors += 1
                         win_other_errors += 1
-                        status_event = f"err:{type(e).__name__}"
-
-                # --- log one line each loop (10Hz) ---
-                w.writerow([
-                    f"{t:.3f}",
-                    f"{rate:.6f}",
-                    f"{error:.6f}",
-                    f"{speed_cmd:.3f}",
-                    status_event,
-                    st_temp,
-                    st_spd,
-                    st_enc
-                ])
+                    if status_event != "ok":
+                        flush_now = True
+
+                # --- log one line each loop (10Hz): Rohwerte merken, Formatierung im Block ---
+                append_row((t, rate, error, speed_cmd, status_event, st_temp, st_spd, st_enc))
+                if len(rows_buf) >= CSV_BATCH_ROWS:
+                    write("".join([CSV_ROW_FMT % r for r in rows_buf]))
+                    rows_buf.clear()
+                    if flush_now or now - last_flush >= CSV_FLUSH_S:
+                        f.flush()
+                        last_flush = now
+                        flush_now = False
 
                 # --- stats window ---
                 if now - win_start >= WINDOW_S:
@@ -176,6 +214,14 @@ def main():
         except KeyboardInterrupt:
             print("\nCtrl+C")
         finally:
+            pacer.close()
+            status_stop.set()
+            status_thread.join(timeout=2.0)
+
+            if rows_buf:
+                write("".join([CSV_ROW_FMT % r for r in rows_buf]))
+                rows_buf.clear()
+
             print("\nStopping motor...")
             try:
                 # try a few times
@@ -197,6 +243,8 @@ def main():
             except Exception:
                 pass
 
+            set_windows_timer_resolution(False)
+
     print("Done.")
     print(f"loops={loops}, speed_cmd_sent={speed_cmd_sent}")
     print(f"status_ok={status_ok}, status_timeouts_total={status_timeouts_total}, other_errors={other_errors}")
@@ -1,11 +1,14 @@
 # gyems_gui_tk.py
+import threading
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox
 
 from gyems_rs485 import GyemsRmdRs485, GyemsStatus
 
 
 BAUD_FIXED = 115200
+LIVE_INTERVAL_S = 0.2
 
 
 class GyemsGui(ttk.Frame):
@@ -18,6 +21,13 @@ class GyemsGui(ttk.Frame):
         self.motor: GyemsRmdRs485 | None = None
         self.connected = False
 
+        # Live-Reads laufen im Reader-Thread; Tk liest nur das jeweils neueste Ergebnis.
+        # _io_lock serialisiert den Bus zwischen Reader-Thread und Button-Kommandos.
+        self._io_lock = threading.Lock()
+        self._live: deque = deque(maxlen=1)
+        self._reader_stop = threading.Event()
+        self._reader: threading.Thread | None = None
+
         # --- top: connection ---
         conn = ttk.LabelFrame(self, text="Connection")
         conn.grid(row=0, column=0, sticky="ew", padx=4, pady=4)
@@ -106,7 +116,7 @@ class GyemsGui(ttk.Frame):
         # --- init ---
         self.refresh_ports()
         self.master.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.after(200, self.update_live)
+        self.after(int(LIVE_INTERVAL_S * 1000), self.update_live)
 
     def refresh_ports(self):
         ports = GyemsRmdRs485.list_ports()
@@ -123,6 +133,7 @@ class GyemsGui(ttk.Frame):
             self.motor = GyemsRmdRs485(port=port, motor_id=0x01, baudrate=BAUD_FIXED, timeout=0.2)
             self.motor.connect()
             self.connected = True
+            self._start_reader()
             self.connect_btn.config(state="disabled")
             self.disconnect_btn.config(state="normal")
             self.err_var.set("")
@@ -132,6 +143,7 @@ class GyemsGui(ttk.Frame):
             messagebox.showerror("Connect failed", str(e))
 
     def disconnect(self):
+        self._stop_reader()
         try:
             if self.motor:
                 self.motor.close()
@@ -145,7 +157,8 @@ class GyemsGui(ttk.Frame):
         if not self.motor:
             return
         try:
-            info = self.motor.read_model_info()
+            with self._io_lock:
+                info = self.motor.read_model_info(force=True)
             msg = f"Driver: {info.driver}\nMotor: {info.motor}\nHW: {info.hw_version}\nFW: {info.fw_version}"
             messagebox.showinfo("Model Info", msg)
         except Exception as e:
@@ -155,7 +168,8 @@ class GyemsGui(ttk.Frame):
         if not self.motor:
             return
         try:
-            err = self.motor.read_error_flags()
+            with self._io_lock:
+                err = self.motor.read_error_flags()
             messagebox.showinfo("Errors (raw)", f"{err}")
         except Exception as e:
             messagebox.showerror("Read Errors failed", str(e))
@@ -164,7 +178,8 @@ class GyemsGui(ttk.Frame):
         if not self.motor:
             return
         try:
-            self.motor.clear_error_flags()
+            with self._io_lock:
+                self.motor.clear_error_flags()
             self.err_var.set("Errors cleared.")
         except Exception as e:
             messagebox.showerror("Clear Errors failed", str(e))
@@ -173,7 +188,8 @@ class GyemsGui(ttk.Frame):
         if not self.motor:
             return
         try:
-            self.motor.shutdown()
+            with self._io_lock:
+                self.motor.shutdown()
         except Exception as e:
             messagebox.showerror("Stop failed", str(e))
 
@@ -182,7 +198,8 @@ class GyemsGui(ttk.Frame):
             return
         try:
             val = float(self.speed_entry.get().replace(",", "."))
-            self.motor.set_speed_deg_s(val)
+            with self._io_lock:
+                self.motor.set_speed_deg_s(val)
         except ValueError:
             messagebox.showerror("Input error", "Speed must be a number.")
         except Exception as e:
@@ -193,29 +210,59 @@ class GyemsGui(ttk.Frame):
             return
         try:
             val = float(self.abs_entry.get().replace(",", "."))
-            self.motor.move_to_abs_angle_deg(val)
+            with self._io_lock:
+                self.motor.move_to_abs_angle_deg(val)
         except ValueError:
             messagebox.showerror("Input error", "Angle must be a number.")
         except Exception as e:
             messagebox.showerror("Move Abs failed", str(e))
 
-    def update_live(self):
-        if self.motor and self.connected:
+    def _start_reader(self):
+        self._stop_reader()
+        self._live.clear()
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._reader_loop, args=(self.motor,), daemon=True)
+        self._reader.start()
+
+    def _stop_reader(self):
+        self._reader_stop.set()
+        if self._reader is not None:
+            self._reader.join(timeout=2.0)
+            self._reader = None
+
+    def _reader_loop(self, motor: GyemsRmdRs485):
+        # Serielle Live-Reads ausserhalb des Tk-Threads: ein 0.2 s Timeout blockiert nur hier.
+        while not self._reader_stop.is_set():
             try:
-                ang = self.motor.read_singleturn_angle_deg()
-                st: GyemsStatus = self.motor.read_status()
+                with self._io_lock:
+                    ang = motor.read_singleturn_angle_deg()
+                    st: GyemsStatus = motor.read_status()
+                self._live.append((ang, st, None))
+            except Exception as e:
+                self._live.append((None, None, e))
+            self._reader_stop.wait(LIVE_INTERVAL_S)
+
+    def update_live(self):
+        # nur Tcl-Variablen setzen, kein serielles I/O im GUI-Thread
+        try:
+            ang, st, err = self._live.popleft()
+        except IndexError:
+            pass
+        else:
+            if err is not None:
+                # keep GUI alive; show last error
+                self.err_var.set(f"COMM: {err}")
+            else:
                 self.angle_var.set(f"{ang:.2f}")
                 self.temp_var.set(str(st.temperature_C))
                 self.iq_var.set(str(st.torque_current))
                 self.spd_var.set(str(st.speed_raw))
                 self.enc_var.set(str(st.encoder_pos))
                 self.err_var.set("")
-            except Exception as e:
-                # keep GUI alive; show last error
-                self.err_var.set(f"COMM: {e}")
-        self.after(200, self.update_live)
+        self.after(int(LIVE_INTERVAL_S * 1000), self.update_live)
 
     def on_close(self):
+        self._stop_reader()
         try:
             if self.motor:
                 try:
@@ -1,4 +1,6 @@
 import csv
+import queue
+import threading
 import time
 import math
 from datetime import datetime
@@ -12,6 +14,7 @@ BAUD = 115200
 
 DURATION_S = 30 * 60          # 30 minutes
 LOOP_HZ = 10                  # "regelkreis" update rate
+PERIOD_NS = 1_000_000_000 // LOOP_HZ   # Takt in ganzen ns: keine Float-Drift über 18000 Ticks
 MAX_RPS = 2                 # max 0.5 rotations per second
 MAX_DPS = MAX_RPS * 360.0     # = 180 deg/s
 
@@ -20,16 +23,63 @@ MAX_DPS = MAX_RPS * 360.0     # = 180 deg/s
 PROFILE_FREQ_HZ = 0.05        # 0.05 Hz -> period 20 s (slow sweeping)
 READ_ANGLE = True
 READ_STATUS = True
+# 0xA2 + 0x94 + 0x9C in einem write (pipelined); nur wenn Adapter/Motor das vertragen
+PIPELINE_REQUESTS = False
 READ_ERRORS_EVERY_S = 5.0     # read error flags periodically (0x9A)
 CLEAR_ERRORS_ON_START = True
 CLEAR_ERRORS_ON_END = False   # usually keep for post-mortem, but can set True
 
+# CSV: Zeilen sammeln und alle CSV_BATCH_LOOPS Loops (~5 s) blockweise schreiben
+CSV_BATCH_LOOPS = 50
+CSV_BUFFER_BYTES = 1 << 16
+
 CSV_FILE = f"gyems_reliability_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 # --------------------------
 
 
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
+# Profil ist periodisch: eine Periode (LOOP_HZ / PROFILE_FREQ_HZ Ticks) vorberechnen
+SPEED_LUT = [
+    MAX_DPS * math.sin(2 * math.pi * PROFILE_FREQ_HZ * k / LOOP_HZ)
+    for k in range(round(LOOP_HZ / PROFILE_FREQ_HZ))
+]
+
+
+# Exception-Klasse -> (Zähler in counts, Event-Tag); alles andere: other_err / "err"
+ERR_MAP = {
+    TimeoutError: ("timeouts", "timeout"),
+    GyemsProtocolError: ("proto_err", "proto_err"),
+}
+
+
+def classify_error(exc: Exception, suffix: str = "") -> tuple[str, str]:
+    """Returns (counter_key, event) für eine Exception aus dem Motor-I/O."""
+    for cls in type(exc).__mro__:
+        entry = ERR_MAP.get(cls)
+        if entry is not None:
+            break
+    else:
+        entry = ("other_err", "err")
+    key, tag = entry
+    if key == "timeouts":
+        return key, tag + suffix
+    return key, f"{tag}{suffix}:{exc}"
+
+
+def error_reader(motor: GyemsRmdRs485, stop_evt: threading.Event, results: queue.SimpleQueue, t0: float):
+    """
+    Periodisches 0x9A-Lesen (READ_ERRORS_EVERY_S) in eigenem Thread, damit der
+    Speed-Tick nicht auf Fehlerflags + ggf. Timeout wartet. Die Request/Antwort-Paare
+    serialisiert der Treiber selbst. Ergebnisse: (t, counter_key | None, event, err_dict | None).
+    """
+    monotonic = time.monotonic
+    next_read = monotonic()
+    while not stop_evt.wait(timeout=max(0.0, next_read - monotonic())):
+        next_read += READ_ERRORS_EVERY_S
+        t = monotonic() - t0
+        try:
+            results.put((t, None, "ok", motor.read_error_flags()))
+        except Exception as e:
+            results.put((t, *classify_error(e, "_read_errors"), None))
 
 
 def main():
@@ -58,11 +108,32 @@ def main():
         "err_reads": 0,
     }
 
-    t0 = time.time()
-    next_tick = t0
-    next_err_read = t0
-
-    with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
+    # monotone Uhr: NTP-/Sommerzeit-Sprünge während 30 min dürfen den Takt nicht verschieben
+    monotonic = time.monotonic
+    monotonic_ns = time.monotonic_ns
+    t0_ns = monotonic_ns()
+    t0 = t0_ns / 1e9
+    next_tick_ns = t0_ns
+
+    err_results: queue.SimpleQueue = queue.SimpleQueue()
+    err_stop = threading.Event()
+    err_thread = threading.Thread(target=error_reader, args=(motor, err_stop, err_results, t0), daemon=True)
+
+    # Einträge: fertige CSV-Zeile (str, "ok"-Pfad) oder Liste für csv.writer (Fehler-/Eventzeilen)
+    rows_buf = []
+    add_row = rows_buf.append
+
+    def flush_rows(f, w) -> None:
+        write = f.write
+        writerow = w.writerow
+        for row in rows_buf:
+            if row.__class__ is str:
+                write(row)
+            else:
+                writerow(row)
+        rows_buf.clear()
+
+    with open(CSV_FILE, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_BYTES) as f:
         w = csv.writer(f, delimiter=";")
         w.writerow([
             "t_s",
@@ -95,88 +166,82 @@ def main():
             except Exception:
                 pass
 
+            err_thread.start()
+
             while True:
-                now = time.time()
-                if now - t0 >= DURATION_S:
+                now_ns = monotonic_ns()
+                if now_ns - t0_ns >= DURATION_S * 1_000_000_000:
                     print("\nReached duration. Stopping.")
                     break
 
-                # pacing
-                if now < next_tick:
-                    time.sleep(min(0.01, next_tick - now))
-                    continue
-                next_tick += 1.0 / LOOP_HZ
+                # pacing: einmal bis zur Deadline schlafen statt 10-ms-Polling
+                if now_ns < next_tick_ns:
+                    time.sleep((next_tick_ns - now_ns) / 1e9)
+                    now_ns = monotonic_ns()
+                next_tick_ns += PERIOD_NS
 
-                t = now - t0
+                t = (now_ns - t0_ns) / 1e9
                 counts["loops"] += 1
 
-                # simulate "regelkreis output"
-                speed_cmd = MAX_DPS * math.sin(2 * math.pi * PROFILE_FREQ_HZ * t)
-                speed_cmd = clamp(speed_cmd, -MAX_DPS, MAX_DPS)
+                # simulate "regelkreis output" (Tick-Index, Ticks werden nicht übersprungen)
+                speed_cmd = SPEED_LUT[(counts["loops"] - 1) % len(SPEED_LUT)]
 
-                # periodic error read
+                # periodic error read (Ergebnis aus dem Error-Thread, non-blocking)
                 err_voltage = ""
                 err_flags = ""
-                if now >= next_err_read:
-                    next_err_read += READ_ERRORS_EVERY_S
-                    try:
-                        err = motor.read_error_flags()
+                try:
+                    t_err, err_key, err_event, err = err_results.get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    if err_key is None:
                         counts["err_reads"] += 1
                         err_voltage = err.get("voltage_V_guess", "")
                         err_flags = err.get("flags_guess_byte", "")
-                    except TimeoutError:
-                        counts["timeouts"] += 1
-                        w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", "", "", "timeout_read_errors"])
-                    except GyemsProtocolError as e:
-                        counts["proto_err"] += 1
-                        w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", "", "", f"proto_err_read_errors:{e}"])
-                    except Exception as e:
-                        counts["other_err"] += 1
-                        w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", "", "", f"err_read_errors:{e}"])
+                    else:
+                        counts[err_key] += 1
+                        add_row([f"{t_err:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", "", "", err_event])
 
                 try:
-                    # command speed (like controller)
-                    motor.set_speed_deg_s(speed_cmd)
-
                     angle = ""
                     temp = ""
                     iq = ""
                     spd_raw = ""
                     enc = ""
+                    st = None
 
-                    if READ_ANGLE:
-                        angle = motor.read_singleturn_angle_deg()
+                    if PIPELINE_REQUESTS and READ_ANGLE and READ_STATUS:
+                        angle, st = motor.set_speed_read_angle_status(speed_cmd)
+                    else:
+                        # command speed (like controller)
+                        motor.set_speed_deg_s(speed_cmd)
 
-                    if READ_STATUS:
-                        st = motor.read_status()
+                        if READ_ANGLE:
+                            angle = motor.read_singleturn_angle_deg()
+
+                        if READ_STATUS:
+                            st = motor.read_status()
+
+                    if st is not None:
                         temp = st.temperature_C
                         iq = st.torque_current
                         spd_raw = st.speed_raw
                         enc = st.encoder_pos
 
-                    w.writerow([
-                        f"{t:.3f}",
-                        f"{speed_cmd:.2f}",
-                        f"{angle:.2f}" if angle != "" else "",
-                        temp,
-                        iq,
-                        spd_raw,
-                        enc,
-                        err_voltage,
-                        err_flags,
-                        "ok",
-                    ])
+                    # "ok"-Zeile fertig formatiert (nur Zahlen, kein Quoting noetig) statt csv.writer
+                    add_row(
+                        f"{t:.3f};{speed_cmd:.2f};{f'{angle:.2f}' if angle != '' else ''};"
+                        f"{temp};{iq};{spd_raw};{enc};{err_voltage};{err_flags};ok\r\n"
+                    )
                     counts["ok"] += 1
 
-                except TimeoutError:
-                    counts["timeouts"] += 1
-                    w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", err_voltage, err_flags, "timeout"])
-                except GyemsProtocolError as e:
-                    counts["proto_err"] += 1
-                    w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", err_voltage, err_flags, f"proto_err:{e}"])
                 except Exception as e:
-                    counts["other_err"] += 1
-                    w.writerow([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", err_voltage, err_flags, f"err:{e}"])
+                    key, event = classify_error(e)
+                    counts[key] += 1
+                    add_row([f"{t:.3f}", f"{speed_cmd:.2f}", "", "", "", "", "", err_voltage, err_flags, event])
+
+                if counts["loops"] % CSV_BATCH_LOOPS == 0:
+                    flush_rows(f, w)
 
                 # small live print every ~2 seconds
                 if counts["loops"] % int(2 * LOOP_HZ) == 0:
@@ -188,14 +253,21 @@ def main():
 
         except KeyboardInterrupt:
             print("\nCtrl+C received. Stopping.")
-            w.writerow([f"{time.time()-t0:.3f}", "", "", "", "", "", "", "", "", "keyboard_interrupt"])
+            add_row([f"{monotonic()-t0:.3f}", "", "", "", "", "", "", "", "", "keyboard_interrupt"])
         finally:
+            err_stop.set()
+            if err_thread.is_alive():
+                err_thread.join(timeout=1.0)
+
             # Always stop motor
             try:
                 motor.set_speed_deg_s(0.0)
             except Exception:
                 pass
 
+            if rows_buf:
+                flush_rows(f, w)
+
             if CLEAR_ERRORS_ON_END:
                 try:
                     motor.clear_error_flags()
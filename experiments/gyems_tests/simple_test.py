@@ -1,54 +1,72 @@
 import serial
 import struct
+import sys
 import time
 import threading
 import queue
 
 PORT = "COM4"
 BAUD = 115200
-TIMEOUT = 0.15
+TIMEOUT = 0.05         # Antwort (<= 13 Byte @115200) ist nach ~2 ms da
 MOTOR_ID = 0x01
 
 POLL_DT = 0.2          # Anzeige-Update
 SPEED_STEP_DPS = 30.0
 MAX_DPS = 720.0
 
+_U16_UNPACK_FROM = struct.Struct("<H").unpack_from
+_I32_PACK_INTO = struct.Struct("<i").pack_into
+_ANGLE_LINE = "Angle: {:8.2f}° | SpeedCmd: {:7.1f} °/s\n".format
+
 def checksum(data: bytes) -> int:
     return sum(data) & 0xFF
 
 def build_frame(cmd: int, motor_id: int, data: bytes = b"") -> bytes:
-    header = bytes([0x3E, cmd, motor_id, len(data)])
-    frame = header + bytes([checksum(header)])
+    n = len(data)
+    # Header-Checksumme direkt aus den 4 ints, ohne Zwischen-bytes
+    frame = bytes([0x3E, cmd, motor_id, n, (0x3E + cmd + motor_id + n) & 0xFF])
     if data:
         frame += data + bytes([checksum(data)])
     return frame
 
-def txrx(ser: serial.Serial, cmd: int, data: bytes = b"", resp_len: int = 16, wait: float = 0.03) -> bytes:
+# 0xA2-Frame fuer MOTOR_ID: Header + Header-Checksumme sind konstant, pro Aufruf werden
+# nur die 4 Datenbytes + Daten-Checksumme in-place ueberschrieben
+_SPEED_FRAME = bytearray(build_frame(0xA2, MOTOR_ID, bytes(4)))
+
+# Antwortlaenge pro Kommando: 5 Byte Header + Daten + 1 Byte Daten-Checksumme
+# 0x94: uint16 Winkel; 0xA2: Status (temp, iq, speed, encoder)
+_RESP_LEN = {0x94: 5 + 2 + 1, 0xA2: 5 + 7 + 1}
+
+def txrx(ser: serial.Serial, cmd: int, data: bytes = b"") -> bytes:
+    return txrx_frame(ser, build_frame(cmd, MOTOR_ID, data), _RESP_LEN.get(cmd, 16))
+
+def txrx_frame(ser: serial.Serial, frame, resp_len: int) -> bytes:
     # flush old bytes to avoid mixing frames
     try:
         ser.reset_input_buffer()
     except Exception:
         pass
 
-    ser.write(build_frame(cmd, MOTOR_ID, data))
+    ser.write(frame)
     ser.flush()
-    time.sleep(wait)
 
-    # read up to resp_len bytes, bounded by TIMEOUT
+    # kein fixes Sleep: read() kehrt zurueck, sobald die resp_len Bytes da sind (max. TIMEOUT)
     return ser.read(resp_len)
 
 def read_singleturn_angle_deg(ser: serial.Serial) -> float:
-    resp = txrx(ser, 0x94, resp_len=16)
+    resp = txrx(ser, 0x94)
     if len(resp) < 7:
         raise IOError(f"angle resp too short ({len(resp)} bytes)")
-    raw = struct.unpack("<H", resp[5:7])[0]
+    raw = _U16_UNPACK_FROM(resp, 5)[0]
     return raw * 0.01
 
 def set_speed_dps(ser: serial.Serial, dps: float):
     dps = max(-MAX_DPS, min(MAX_DPS, dps))
     val = int(dps * 100)           # 0.01 deg/s
-    data = struct.pack("<i", val)  # int32 LE
-    resp = txrx(ser, 0xA2, data=data, resp_len=32)
+    frame = _SPEED_FRAME           # nur aus dem Main-Thread benutzt -> kein Lock noetig
+    _I32_PACK_INTO(frame, 5, val)  # int32 LE
+    frame[9] = (frame[5] + frame[6] + frame[7] + frame[8]) & 0xFF
+    resp = txrx_frame(ser, frame, _RESP_LEN[0xA2])
     return dps, resp
 
 def input_thread(cmd_queue: queue.Queue):
@@ -77,14 +95,17 @@ def main():
         except Exception:
             pass
 
-        t_next = time.time()
+        t_next = time.monotonic()
 
         try:
             while True:
-                # process all queued commands
-                while not cmd_queue.empty():
-                    cmd = cmd_queue.get_nowait().lower()
+                # bis zum naechsten Anzeige-Update auf Befehle warten (weckt sofort bei Eingabe)
+                try:
+                    cmd = cmd_queue.get(timeout=max(0.0, t_next - time.monotonic())).lower()
+                except queue.Empty:
+                    cmd = None
 
+                if cmd is not None:
                     if cmd == "w":
                         speed += SPEED_STEP_DPS
                         speed, _ = set_speed_dps(ser, speed)
@@ -115,17 +136,15 @@ def main():
                         except ValueError:
                             print("Unbekannter Befehl. Nutze: w, s, 0, q oder Zahl (z.B. 360)")
 
-                now = time.time()
+                now = time.monotonic()
                 if now >= t_next:
                     t_next = now + POLL_DT
                     try:
                         ang = read_singleturn_angle_deg(ser)
-                        print(f"Angle: {ang:8.2f}° | SpeedCmd: {speed:7.1f} °/s")
+                        sys.stdout.write(_ANGLE_LINE(ang, speed))
                     except Exception as e:
                         print(f"COMM ERROR: {e}")
 
-                time.sleep(0.01)
-
         except KeyboardInterrupt:
             # clean exit on Ctrl+C
             print("\nCtrl+C -> stop")
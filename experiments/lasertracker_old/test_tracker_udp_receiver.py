@@ -0,0 +1,58 @@
+# lasertracker_old/test_tracker_udp_receiver.py
+
+from __future__ import annotations
+
+try:
+    from .tracker_udp_receiver import parse_sa_watch_line
+except ImportError:
+    from tracker_udp_receiver import parse_sa_watch_line
+
+
+# (Bezeichnung, Datagramm, erwartetes Ergebnis von parse_sa_watch_line)
+CASES = [
+    (
+        "gueltig",
+        b"Pt1 | X,    3744.50, | Y,    1309.42, | Z,      54.65, | Units: (mm) |",
+        (3744.50, 1309.42, 54.65, "mm"),
+    ),
+    (
+        "ohne Units",
+        b"| X, 1.0, | Y, 2.0, | Z, 3.0, |",
+        (1.0, 2.0, 3.0, "unknown"),
+    ),
+    (
+        "Reihenfolge Y X Z",
+        b"| Y, 2.0, | X, 1.0, | Z, 3.0, | Units: (m) |",
+        (1.0, 2.0, 3.0, "m"),
+    ),
+    (
+        "Units vor den Achsen",
+        b"Units: (mm) | X, 1.0, | Y, 2.0, | Z, 3.0, |",
+        (1.0, 2.0, 3.0, "mm"),
+    ),
+    (
+        "Achse doppelt -> letzter Wert",
+        b"| X, 1.0, | Y, 2.0, | Z, 3.0, | X, 9.0, |",
+        (9.0, 2.0, 3.0, "unknown"),
+    ),
+    ("kaputt", b"1 2", None),
+    ("Achse leer", b"| X, , | Y, 2.0, | Z, 3.0, |", None),
+    ("Zahl ungueltig", b"| X, 1.2.3, | Y, 2.0, | Z, 3.0, |", None),
+]
+
+
+def test_parse_sa_watch_line_table() -> None:
+    for name, data, expected in CASES:
+        # wie im Empfangspfad: memoryview auf den Puffer
+        result = parse_sa_watch_line(memoryview(data))
+        if result != expected:
+            raise AssertionError(f"{name}: erwartet {expected!r}, erhalten {result!r}")
+        print(f"OK: {name}")
+
+
+def main() -> None:
+    test_parse_sa_watch_line_table()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
+import re
+import selectors
 import socket
 import threading
 import time
 import math
+import warnings
 import tkinter as tk
 from tkinter import ttk
 from typing import Optional, Dict, Any
 
 
+# Ein Durchlauf über die SA-Watch-Zeile: "| X, <wert>, ..." (Achse am Anfang eines |-Feldes)
+# oder "Units: (<einheit>)" irgendwo in einem Feld.
+_SA_TOKEN_RE = re.compile(r"(?:^|\|)\s*([XYZ])[^,|]*,([^,|]*)|Units:([^|]*)")
+
+
 class TrackerUdpReceiver:
     """
     Lasertracker-Receiver für Spatial Analyzer Watch Window Text.
@@ -26,15 +34,23 @@ class TrackerUdpReceiver:
         bind_ip: str = "0.0.0.0",
         buffer_size: int = 8192,
         timeout_s: float = 5.0,
-        socket_poll_s: float = 0.5,
+        socket_poll_s: Optional[float] = None,
     ):
         self.port = port
         self.bind_ip = bind_ip
         self.buffer_size = buffer_size
         self.timeout_s = float(timeout_s)
-        self.socket_poll_s = float(socket_poll_s)
+        if socket_poll_s is not None:
+            # _run blockiert im Selector, stop() weckt per Wake-Socket -> kein Poll-Intervall mehr
+            warnings.warn(
+                "TrackerUdpReceiver: socket_poll_s hat keine Wirkung mehr und wird entfernt",
+                DeprecationWarning,
+                stacklevel=2,
+            )
 
         self._sock: Optional[socket.socket] = None
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
 
@@ -52,22 +68,32 @@ class TrackerUdpReceiver:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         sock.bind((self.bind_ip, self.port))
-        sock.settimeout(self.socket_poll_s)
 
         self._sock = sock
+        # Self-Pipe (socketpair geht auch unter Windows): stop() weckt den blockierten
+        # Empfangs-Thread sofort, statt dass er periodisch nachsieht.
+        self._wake_r, self._wake_w = socket.socketpair()
         self._thread = threading.Thread(target=self._run, name="TrackerUdpReceiver", daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         self._stop_event.set()
-        if self._sock:
+        if self._wake_w:
             try:
-                self._sock.close()
+                self._wake_w.send(b"\0")
             except OSError:
                 pass
         if self._thread:
             self._thread.join(timeout=2.0)
+        for s in (self._sock, self._wake_r, self._wake_w):
+            if s:
+                try:
+                    s.close()
+                except OSError:
+                    pass
         self._sock = None
+        self._wake_r = None
+        self._wake_w = None
         self._thread = None
 
     def is_running(self) -> bool:
@@ -90,78 +116,86 @@ class TrackerUdpReceiver:
         return m
 
     def _run(self) -> None:
-        assert self._sock is not None
+        assert self._sock is not None and self._wake_r is not None
         sock = self._sock
+        wake_r = self._wake_r
+        # ein Empfangspuffer pro Thread-Laufzeit statt neuem bytes-Objekt pro Datagramm
+        rx_view = memoryview(bytearray(self.buffer_size))
 
-        while not self._stop_event.is_set():
-            try:
-                data, addr = sock.recvfrom(self.buffer_size)
-            except TimeoutError:
-                continue
-            except OSError:
-                break  # socket closed
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        sel.register(wake_r, selectors.EVENT_READ)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    events = sel.select()
+                except OSError:
+                    break  # socket closed
+                if any(key.fileobj is wake_r for key, _ in events):
+                    break  # stop()
+
+                try:
+                    nbytes, addr = sock.recvfrom_into(rx_view)
+                except OSError:
+                    break  # socket closed
+
+                self._handle_datagram(rx_view[:nbytes], addr)
+        finally:
+            sel.close()
 
-            rx_ts = time.time()
+    def _handle_datagram(self, data, addr) -> None:
+        # data: bytes-like (View in den Empfangspuffer, nur bis _decode gültig)
+        rx_ts = time.time()
+        with self._lock:
+            self._last_rx_time = rx_ts
+
+        line = self._decode(data)
+        parsed = self._parse_sa_watch_line(line)
+
+        measurement = {
+            "timestamp": rx_ts,
+            "src_ip": addr[0],
+            "src_port": addr[1],
+            "x": parsed.get("x"),
+            "y": parsed.get("y"),
+            "z": parsed.get("z"),
+            "unit": parsed.get("unit", "unknown"),
+            "measurement_valid": parsed.get("measurement_valid", False),
+            "raw": line,
+        }
+
+        if measurement["measurement_valid"]:
             with self._lock:
-                self._last_rx_time = rx_ts
-
-            line = self._decode(data)
-            parsed = self._parse_sa_watch_line(line)
-
-            measurement = {
-                "timestamp": rx_ts,
-                "src_ip": addr[0],
-                "src_port": addr[1],
-                "x": parsed.get("x"),
-                "y": parsed.get("y"),
-                "z": parsed.get("z"),
-                "unit": parsed.get("unit", "unknown"),
-                "measurement_valid": parsed.get("measurement_valid", False),
-                "raw": line,
-            }
-
-            if measurement["measurement_valid"]:
-                with self._lock:
-                    self._last_valid_time = rx_ts
+                self._last_valid_time = rx_ts
 
-            with self._lock:
-                self._latest = measurement
+        with self._lock:
+            self._latest = measurement
 
     @staticmethod
-    def _decode(data: bytes) -> str:
+    def _decode(data) -> str:
+        # str(buffer, encoding) dekodiert direkt aus bytes/memoryview, ohne Zwischenkopie
         try:
-            return data.decode("utf-8").strip()
+            return str(data, "utf-8").strip()
         except UnicodeDecodeError:
-            return data.decode("latin-1").strip()
+            return str(data, "latin-1").strip()
 
     @staticmethod
     def _parse_sa_watch_line(line: str) -> Dict[str, Any]:
-        parts = [p.strip() for p in line.split("|")]
-
-        x = y = z = None
+        axes: Dict[str, Optional[float]] = {"X": None, "Y": None, "Z": None}
         unit = None
 
-        for p in parts:
-            if not p:
+        for m in _SA_TOKEN_RE.finditer(line):
+            axis = m.group(1)
+            if axis is not None:
+                axes[axis] = TrackerUdpReceiver._parse_axis_value(m.group(2))
                 continue
 
-            if "Units:" in p:
-                tail = p.split("Units:", 1)[1].strip().strip(",").strip()
-                if tail.startswith("(") and tail.endswith(")"):
-                    tail = tail[1:-1].strip()
-                unit = tail if tail else "unknown"
-                continue
-
-            if p.startswith("X"):
-                x = TrackerUdpReceiver._parse_axis_value(p)
-                continue
-            if p.startswith("Y"):
-                y = TrackerUdpReceiver._parse_axis_value(p)
-                continue
-            if p.startswith("Z"):
-                z = TrackerUdpReceiver._parse_axis_value(p)
-                continue
+            tail = m.group(3).strip().strip(",").strip()
+            if tail.startswith("(") and tail.endswith(")"):
+                tail = tail[1:-1].strip()
+            unit = tail if tail else "unknown"
 
+        x, y, z = axes["X"], axes["Y"], axes["Z"]
         valid = (
             x is not None and y is not None and z is not None
             and math.isfinite(x) and math.isfinite(y) and math.isfinite(z)
@@ -170,23 +204,27 @@ class TrackerUdpReceiver:
         return {"x": x, "y": y, "z": z, "unit": unit or "unknown", "measurement_valid": valid}
 
     @staticmethod
-    def _parse_axis_value(token: str) -> Optional[float]:
-        parts = [t.strip() for t in token.split(",")]
-        if len(parts) < 2 or not parts[1]:
+    def _parse_axis_value(value: str) -> Optional[float]:
+        """Wert hinter dem ersten Komma eines Achsenfeldes (leer/ungültig -> None)."""
+        value = value.strip()
+        if not value:
             return None
         try:
-            return float(parts[1])
+            return float(value)
         except ValueError:
             return None
 
 
 class TrackerGui(tk.Tk):
+    _NO_DATA = object()  # _last_ts-Marker: Anzeige steht auf "keine Daten"
+
     def __init__(self):
         super().__init__()
         self.title("Tracker Lasertracker Monitor (Spatial Analyzer)")
         self.geometry("860x420")
 
         self.rx = TrackerUdpReceiver(port=10000, timeout_s=5.0)
+        self._last_ts: Any = None  # Zeitstempel des zuletzt angezeigten Pakets
 
         # --- UI Variables ---
         self.var_running = tk.StringVar(value="Stopped")
@@ -265,56 +303,64 @@ class TrackerGui(tk.Tk):
         self.var_link.set("Offline")
 
     def _update_view(self):
+        set_var = self._set_var
+
         # Receiver running indicator (falls Thread unerwartet stoppt)
-        self.var_running.set("Running" if self.rx.is_running() else "Stopped")
+        set_var(self.var_running, "Running" if self.rx.is_running() else "Stopped")
 
         m = self.rx.get_latest()
 
         if m is None:
-            self.var_link.set("Offline")
-            self.var_valid.set("-")
-            self.var_xyz.set("-")
-            self.var_unit.set("-")
-            self.var_ts.set("-")
-            self.var_src.set("-")
-            self.var_stale.set("-")
-            self._set_text("")
+            if self._last_ts is not self._NO_DATA:
+                self._last_ts = self._NO_DATA
+                for var in (self.var_valid, self.var_xyz, self.var_unit, self.var_ts, self.var_src, self.var_stale):
+                    set_var(var, "-")
+                self._set_text("")
+            set_var(self.var_link, "Offline")
         else:
-            # Link status
-            self.var_link.set("Online" if m.get("link_alive") else "Offline")
+            # Link status + Stale laufen auch ohne neues Paket weiter
+            set_var(self.var_link, "Online" if m.get("link_alive") else "Offline")
+            stale_s = m.get("stale_s")
+            set_var(self.var_stale, f"{stale_s:.2f}" if isinstance(stale_s, (int, float)) else "-")
 
-            # Valid
-            self.var_valid.set("True" if m.get("measurement_valid") else "False")
+            # Rest nur neu aufbauen, wenn ein neues Paket da ist
+            ts = m.get("timestamp")
+            if ts != self._last_ts:
+                self._last_ts = ts
 
-            # XYZ
-            x, y, z = m.get("x"), m.get("y"), m.get("z")
-            if x is not None and y is not None and z is not None:
-                self.var_xyz.set(f"{x:.2f}, {y:.2f}, {z:.2f}")
-            else:
-                self.var_xyz.set(f"{x}, {y}, {z}")
+                # Valid
+                set_var(self.var_valid, "True" if m.get("measurement_valid") else "False")
 
-            # Unit
-            self.var_unit.set(str(m.get("unit", "-")))
+                # XYZ
+                x, y, z = m.get("x"), m.get("y"), m.get("z")
+                if x is not None and y is not None and z is not None:
+                    set_var(self.var_xyz, f"{x:.2f}, {y:.2f}, {z:.2f}")
+                else:
+                    set_var(self.var_xyz, f"{x}, {y}, {z}")
 
-            # Timestamp
-            ts = m.get("timestamp")
-            self.var_ts.set(f"{ts:.3f}" if isinstance(ts, (int, float)) else str(ts))
+                # Unit
+                set_var(self.var_unit, str(m.get("unit", "-")))
 
-            # Source
-            self.var_src.set(f'{m.get("src_ip")}:{m.get("src_port")}')
+                # Timestamp
+                set_var(self.var_ts, f"{ts:.3f}" if isinstance(ts, (int, float)) else str(ts))
 
-            # Stale
-            stale_s = m.get("stale_s")
-            self.var_stale.set(f"{stale_s:.2f}" if isinstance(stale_s, (int, float)) else "-")
+                # Source
+                set_var(self.var_src, f'{m.get("src_ip")}:{m.get("src_port")}')
 
-            # Data structure / raw
-            # Wir zeigen das dict ohne riesige raw-Zeile doppelt an, aber raw ist oft hilfreich.
-            view = dict(m)
-            self._set_text(self._pretty(view))
+                # Data structure / raw (link_alive/stale_s darin: Stand beim Paketeingang)
+                # Wir zeigen das dict ohne riesige raw-Zeile doppelt an, aber raw ist oft hilfreich.
+                view = dict(m)
+                self._set_text(self._pretty(view))
 
         # GUI refresh rate (10 Hz)
         self.after(100, self._update_view)
 
+    @staticmethod
+    def _set_var(var: tk.StringVar, value: str) -> None:
+        # set() loest auch bei gleichem Wert ein Redraw aus -> vorher vergleichen
+        if var.get() != value:
+            var.set(value)
+
     def _set_text(self, s: str):
         self.txt.configure(state="normal")
         self.txt.delete("1.0", "end")
@@ -5,129 +5,366 @@ Erster Versuch für Lasertracker Trackerdaten Empfang.
 Liest Daten aus WatchWindow.
 Port 10000
 
+Nur Standardbibliothek (socket, selectors, re, threading): läuft damit auch unter
+PyPy3 (JIT für Parser/Ausgabe) oder einem free-threaded CPython (3.13t, Empfangs- und
+Haupt-Thread ohne GIL), z.B.  pypy3 tracker_udp_receiver.py
+
 Autor: Andreas Wehner
 Datum: 2026-02-03
 """
 
 
+import logging
+import logging.handlers
+import queue
+import selectors
 import socket
+import sys
+import threading
 import time
 import math
+import os
+import re
+from collections import deque
 
 PORT = 10000
 BUFFER_SIZE = 8192
 NO_DATA_TIMEOUT_S = 5.0
+# Pro Aufwachen alle wartenden Datagramme abholen (max. RX_BATCH) und die Ausgabe des
+# ganzen Bursts als ein Log-Record (= ein write im Listener-Thread) ausgeben
+RX_BATCH = 64
+# Gültige Messwerte höchstens mit 20 Hz ausgeben, außer X/Y/Z haben sich sichtbar geändert
+# (mehr als eine halbe Stelle der 0.01-Anzeige); ungültige Zeilen immer.
+PRINT_MIN_DT_S = 0.05
+PRINT_EPS = 0.005
+# Großer Kernel-Empfangspuffer, damit Bursts nicht still verworfen werden, während die
+# Schleife druckt. Linux begrenzt auf net.core.rmem_max (Default ~208 KiB), ggf. erhöhen:
+#   sysctl -w net.core.rmem_max=12582912  (und net.core.netdev_max_backlog=5000)
+RCVBUF_BYTES = 12 * 1024 * 1024
+# Empfangs-Thread auf den Kern pinnen, der den RX-IRQ der Netzwerkkarte bedient (nur Linux,
+# None = aus); Kern z.B. aus /proc/interrupts, IRQ passend fixieren per
+#   echo <maske> > /proc/irq/<nr>/smp_affinity   (bzw. set_irq_affinity.sh des NIC-Treibers)
+RX_CPU = None
+# SCHED_FIFO-Priorität für den Empfangs-Thread (Linux, braucht CAP_SYS_NICE; 0 = aus)
+RX_RT_PRIORITY = 0
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-sock.bind(("0.0.0.0", PORT))
-
-# Damit wir "seit X Sekunden keine Daten" erkennen können:
-sock.settimeout(0.5)
+# Eine Regex für die ganze Zeile statt split("|") + split(",") + startswith pro Feld.
+# Felder "X, <wert>," / "Y, ..." / "Z, ..." jeweils am Zeilen- oder Feldanfang, Einheit optional.
+# Bytes-Pattern: läuft direkt auf dem Empfangspuffer, dekodiert wird nur bei ungültigen Zeilen.
+# Fast-Path für den Normalfall X -> Y -> Z: die Lücken (_GAP) dürfen kein weiteres Achsenfeld
+# enthalten, damit bei doppelten Achsen nicht still der erste Wert gewinnt.
+_NUM = rb"([-+]?[\d.]+(?:[eE][-+]?\d+)?)"
+_AXIS = rb"\|\s*[XYZ][^,|]*,"
+_GAP = rb"[^|]*(?:\|(?!\s*[XYZ][^,|]*,)[^|]*)*?"
+_SA_RE = re.compile(
+    rb"(?:^|\|)\s*X[^,|]*,\s*" + _NUM + _GAP +
+    rb"\|\s*Y[^,|]*,\s*" + _NUM + _GAP +
+    rb"\|\s*Z[^,|]*,\s*" + _NUM +
+    rb"(?:.*?Units:\s*\(?([^)|,]*))?",
+    re.DOTALL,
+)
+_SA_AXIS_RE = re.compile(_AXIS)
+_SA_UNIT_RE = re.compile(rb"Units:\s*\(?([^)|,]*)")
+# Fallback wie die alte Feld-Schleife (und tracker_udp_interface): Achsen in beliebiger
+# Reihenfolge, bei Wiederholung gewinnt der letzte Wert, Units an beliebiger Stelle.
+_SA_TOKEN_RE = re.compile(rb"(?:^|\|)\s*([XYZ])[^,|]*,([^,|]*)|Units:([^|]*)")
+# Vorfilter für lange Datagramme: _SA_RE scannt fremde Pakete (8 KiB) sonst 150-350 us lang,
+# diese Literal-Suche nach dem Z-Feld (muss in jeder gültigen Zeile stehen) braucht wenige us.
+# Bei normalen Zeilen (~100 B) lohnt sie nicht, daher erst ab SA_PREFILTER_BYTES.
+_SA_HINT_RE = re.compile(rb"(?:^|\|)\s*Z[^,|]*,")
+SA_PREFILTER_BYTES = 256
 
-print(f"Lausche auf Lasertracker Port {PORT} ...")
+# Empfang in eigenem Thread (nur recvfrom_into + deque.append), Parsen/Ausgabe im Haupt-Thread.
+# Wiederverwendete Empfangspuffer statt eines neuen bytes-Objekts pro Paket: Pool aus RX_POOL
+# Slots, freie Slot-Nummern liegen in rx_free, belegte (slot, nbytes, ts, addr) in rx_ready.
+# deque.append/popleft sind unter dem GIL atomar -> kein Lock bei einem Produzenten/Konsumenten.
+# Ist kein Slot frei (Verarbeitung hängt hinterher), wartet der Empfang auf slots_event;
+# die Datagramme bleiben solange im Kernel-Puffer (RCVBUF_BYTES), statt verworfen zu werden.
+RX_POOL = 256
 
-
-def decode_udp_payload(data: bytes) -> str:
+def decode_udp_payload(data) -> str:
+    # data: bytes oder memoryview auf den Empfangspuffer; str(...) dekodiert direkt aus
+    # dem Puffer, ohne vorher eine bytes-Kopie anzulegen
     try:
-        return data.decode("utf-8").strip()
+        return str(data, "utf-8").strip()
     except UnicodeDecodeError:
-        return data.decode("latin-1").strip()
+        return str(data, "latin-1").strip()
 
 
-def parse_sa_watch_line(line: str):
+def parse_sa_watch_line(data):
     """
     Erwartet ungefähr:
-    '...| X,    3744.50, | Y,    1309.42, | Z,      54.65, | ... Units: (mm) ...'
+    b'...| X,    3744.50, | Y,    1309.42, | Z,      54.65, | ... Units: (mm) ...'
+
+    data: rohes Datagramm (bytes oder memoryview auf den Empfangspuffer), wird nicht dekodiert
 
-    Rückgabe: dict mit timestamp/x/y/z/unit/measurement_valid
+    Rückgabe: (x, y, z, unit) wenn die Messung gültig ist, sonst None
     """
-    parts = [p.strip() for p in line.split("|")]
+    if len(data) > SA_PREFILTER_BYTES and _SA_HINT_RE.search(data) is None:
+        return None
+    m = _SA_RE.search(data)
+    # hinter Z noch ein Achsenfeld -> Reihenfolge/Wiederholung wie im Fallback auswerten
+    if m is None or _SA_AXIS_RE.search(data, m.end(3)) is not None:
+        return _parse_sa_tokens(data)
+    try:
+        x, y, z = map(float, m.group(1, 2, 3))  # float() nimmt bytes direkt
+    except ValueError:  # z.B. "1.2.3" -> Messung ungültig
+        return None
 
-    x = y = z = None
-    unit = None
+    # gültig nur, wenn x,y,z nicht NaN/Inf sind
+    # (die Zahl-Gruppen lassen nan/inf gar nicht zu, der Check kostet also praktisch nichts)
+    if not (math.isfinite(x) and math.isfinite(y) and math.isfinite(z)):
+        return None
 
-    for p in parts:
-        if not p:
-            continue
+    unit = m.group(4)
+    if unit is None:
+        # Units vor den Achsen
+        u = _SA_UNIT_RE.search(data)
+        unit = u.group(1) if u is not None else None
+    if unit is not None:
+        unit = unit.strip().decode("latin-1")
+    return x, y, z, unit or "unknown"
 
-        # Einheit finden, z.B. "Units: (mm)"
-        if "Units:" in p:
-            tail = p.split("Units:", 1)[1].strip().strip(",").strip()
-            if tail.startswith("(") and tail.endswith(")"):
-                tail = tail[1:-1].strip()
-            unit = tail if tail else "unknown"
-            continue
 
-        # X/Y/Z finden: typischerweise "X, 3744.50," etc.
-        if p.startswith("X"):
-            tokens = [t.strip() for t in p.split(",")]
-            if len(tokens) >= 2 and tokens[1]:
-                x = float(tokens[1])
+def _parse_sa_tokens(data):
+    """Langsamer Pfad für Zeilen, die nicht der Form X -> Y -> Z folgen (siehe _SA_TOKEN_RE)."""
+    axes = {b"X": None, b"Y": None, b"Z": None}
+    unit = None
+    for m in _SA_TOKEN_RE.finditer(data):
+        axis = m.group(1)
+        if axis is not None:
+            try:
+                axes[axis] = float(m.group(2))
+            except ValueError:  # leer oder ungültig
+                axes[axis] = None
             continue
 
-        if p.startswith("Y"):
-            tokens = [t.strip() for t in p.split(",")]
-            if len(tokens) >= 2 and tokens[1]:
-                y = float(tokens[1])
+        tail = m.group(3).strip().strip(b",").strip()
+        if tail.startswith(b"(") and tail.endswith(b")"):
+            tail = tail[1:-1].strip()
+        unit = tail.decode("latin-1") if tail else "unknown"
+
+    x, y, z = axes[b"X"], axes[b"Y"], axes[b"Z"]
+    if x is None or y is None or z is None:
+        return None
+    if not (math.isfinite(x) and math.isfinite(y) and math.isfinite(z)):
+        return None
+    return x, y, z, unit or "unknown"
+
+
+log = logging.getLogger("tracker_udp_receiver")
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Ausgabe über Queue + Listener-Thread, damit die Empfangsschleife nie auf stdout wartet."""
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(q, handler)
+    log.addHandler(logging.handlers.QueueHandler(q))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener.start()
+    return listener
+
+
+def tune_rx_thread() -> None:
+    """
+    Best effort für den aufrufenden Thread (pid 0 = aufrufender Thread, sched_* wirkt pro Thread):
+    CPU-Pinning auf RX_CPU, SCHED_FIFO mit RX_RT_PRIORITY. Fehlende Rechte werden nur gemeldet.
+    """
+    if RX_CPU is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {int(RX_CPU)})
+        except (OSError, ValueError) as e:
+            log.warning("CPU-Affinität nicht gesetzt: %s", e)
+    if RX_RT_PRIORITY > 0 and hasattr(os, "sched_setscheduler"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(RX_RT_PRIORITY))
+        except OSError as e:
+            log.warning("SCHED_FIFO nicht gesetzt: %s", e)
+
+
+def open_socket() -> socket.socket:
+    """UDP-Socket auf PORT: großer Empfangspuffer, non-blocking (gewartet wird per Selector)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_BYTES)
+    except OSError as e:
+        print(f"Hinweis: SO_RCVBUF nicht gesetzt ({e})")
+    # Linux meldet den doppelten Wert zurück (inkl. Verwaltungs-Overhead), gekappt auf rmem_max
+    rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    if rcvbuf < RCVBUF_BYTES:
+        print(f"Hinweis: SO_RCVBUF nur {rcvbuf // 1024} KiB (angefragt {RCVBUF_BYTES // 1024} KiB), "
+              f"ggf. net.core.rmem_max erhöhen.")
+    sock.bind(("0.0.0.0", PORT))
+    # Non-blocking, damit ein Burst ohne Timeout-Wartezeit leergelesen werden kann
+    sock.setblocking(False)
+    return sock
+
+
+def rx_loop(sock, sel, bufs, rx_free, rx_ready, rx_event, slots_event, stop_event):
+    """Empfangs-Thread: Bursts in freie Pool-Slots lesen und übergeben, "keine Daten" melden."""
+    tune_rx_thread()
+    recvfrom_into = sock.recvfrom_into
+    select = sel.select
+    free_popleft = rx_free.popleft
+    free_append = rx_free.append
+    ready_append = rx_ready.append
+    monotonic = time.monotonic
+    wall = time.time
+    last_rx_time = None
+    no_data_reported = False
+
+    while not stop_event.is_set():
+        # Selector (epoll unter Linux), kein periodisches Aufwachen: schläft bis Daten kommen oder
+        # die "keine Daten"-Frist abläuft. Lückenprüfung monoton (Uhrsprünge egal), time.time()
+        # nur als Zeitstempel pro Paket. Solange eine Warnung aussteht, nur bis zu ihrer
+        # Fälligkeit warten.
+        if last_rx_time is None or no_data_reported:
+            wait_s = NO_DATA_TIMEOUT_S
+        else:
+            wait_s = max(0.0, last_rx_time + NO_DATA_TIMEOUT_S - monotonic())
+
+        events = select(wait_s)
+        if not events:
+            # "Keine Daten seit X Sekunden" melden (einmalig, bis wieder Daten kommen)
+            if last_rx_time is not None and not no_data_reported:
+                gap = monotonic() - last_rx_time
+                if gap >= NO_DATA_TIMEOUT_S:
+                    log.warning("\nWARNUNG: Seit %.1f s keine Lasertracker-Daten empfangen.", gap)
+                    no_data_reported = True
             continue
+        if stop_event.is_set():
+            break
 
-        if p.startswith("Z"):
-            tokens = [t.strip() for t in p.split(",")]
-            if len(tokens) >= 2 and tokens[1]:
-                z = float(tokens[1])
+        n = 0
+        while n < RX_BATCH:
+            if not rx_free:
+                # Pool erschöpft: bisherige übergeben, auf zurückgegebene Slots warten
+                slots_event.clear()
+                rx_event.set()
+                while not rx_free and not stop_event.is_set():
+                    slots_event.wait(NO_DATA_TIMEOUT_S)
+                    slots_event.clear()
+                if stop_event.is_set():
+                    return
+            slot = free_popleft()
+            try:
+                nbytes, addr = recvfrom_into(bufs[slot])
+            except BlockingIOError:
+                free_append(slot)
+                break
+            ready_append((slot, nbytes, wall(), addr))
+            n += 1
+        if not n:
             continue
 
-    # measurement_valid: wir brauchen x,y,z und sie dürfen nicht NaN/Inf sein
-    measurement_valid = (
-        x is not None and y is not None and z is not None
-        and math.isfinite(x) and math.isfinite(y) and math.isfinite(z)
-    )
+        last_rx_time = monotonic()
+        no_data_reported = False
+        rx_event.set()
+
 
-    return {
-        "timestamp": time.time(),
-        "x": x,
-        "y": y,
-        "z": z,
-        "unit": unit or "unknown",
-        "measurement_valid": measurement_valid,
-        "raw": line,  # optional: hilfreich fürs Debuggen
-    }
+def main():
+    sock = open_socket()
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    # Wake-Socket: Beenden weckt den Empfangs-Thread sofort aus sel.select()
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    sel.register(wake_r, selectors.EVENT_READ)
 
+    bufs = [bytearray(BUFFER_SIZE) for _ in range(RX_POOL)]
+    mvs = [memoryview(b) for b in bufs]
+    rx_free = deque(range(RX_POOL))
+    rx_ready = deque()
+    rx_event = threading.Event()     # gesetzt nach jedem Burst
+    slots_event = threading.Event()  # gesetzt, wenn der Haupt-Thread Slots zurückgegeben hat
+    stop_event = threading.Event()
 
-last_rx_time = None
-no_data_reported = False
+    print(f"Lausche auf Lasertracker Port {PORT} ...")
+    log_listener = setup_logging()
+    rx_thread = threading.Thread(
+        target=rx_loop,
+        args=(sock, sel, bufs, rx_free, rx_ready, rx_event, slots_event, stop_event),
+        name="tracker-rx",
+        daemon=True,
+    )
+    rx_thread.start()
 
-while True:
-    now = time.time()
+    # Hot-Loop-Namen als Locals (LOAD_FAST statt Global-/Attribut-Lookup pro Paket)
+    parse = parse_sa_watch_line
+    decode = decode_udp_payload
+    ready_popleft = rx_ready.popleft
+    free_append = rx_free.append
+    info = log.info
 
-    # "Keine Daten seit X Sekunden" melden (einmalig, bis wieder Daten kommen)
-    if last_rx_time is not None:
-        gap = now - last_rx_time
-        if gap >= NO_DATA_TIMEOUT_S and not no_data_reported:
-            print(f"\nWARNUNG: Seit {gap:.1f} s keine Lasertracker-Daten empfangen.")
-            no_data_reported = True
+    last_print_t = 0.0
+    last_px = last_py = last_pz = math.nan
+    # Absender formatieren nur bei Wechsel (praktisch immer derselbe Tracker-PC)
+    last_addr = None
+    last_addr_s = ""
 
     try:
-        data, addr = sock.recvfrom(BUFFER_SIZE)
-    except TimeoutError:
-        continue
+        while True:
+            # Warten bis der Empfangs-Thread einen Burst übergibt (Timeout nur, damit Ctrl+C auch
+            # unter Windows spätestens nach NO_DATA_TIMEOUT_S greift)
+            if not rx_event.wait(NO_DATA_TIMEOUT_S):
+                continue
+            rx_event.clear()  # vor dem Leeren: ein set() währenddessen weckt die nächste Runde
+
+            # Jeder Slot wird sofort geparst und zurückgegeben, danach darf der Empfang ihn
+            # überschreiben
+            # (ungültige Zeilen werden nur fürs Debuggen dekodiert, solange der Slot noch gilt)
+            batch = []
+            while rx_ready:
+                slot, nbytes, ts, addr = ready_popleft()
+                data = mvs[slot][:nbytes]
+                m = parse(data)
+                batch.append((ts, addr, m, None if m is not None else decode(data)))
+                free_append(slot)
+            slots_event.set()
+
+            out = []
+            for ts, addr, m, raw in batch:
+                if addr != last_addr:
+                    last_addr = addr
+                    last_addr_s = f"src {addr[0]}:{addr[1]}"
+                if m is not None:
+                    x, y, z, unit = m
+                    # (NaN-Startwerte -> Vergleiche False -> erste Zeile kommt über das Zeitkriterium)
+                    if (abs(ts - last_print_t) < PRINT_MIN_DT_S
+                            and abs(x - last_px) <= PRINT_EPS
+                            and abs(y - last_py) <= PRINT_EPS
+                            and abs(z - last_pz) <= PRINT_EPS):
+                        continue
+                    last_print_t, last_px, last_py, last_pz = ts, x, y, z
+                    out.append(
+                        f't={ts:.3f}  '
+                        f'X={x:.2f}  Y={y:.2f}  Z={z:.2f}  '
+                        f'[{unit}]  '
+                        f'({last_addr_s})'
+                    )
+                else:
+                    out.append(
+                        f't={ts:.3f}  INVALID  '
+                        f'({last_addr_s})  raw="{raw}"'
+                    )
+            if out:
+                info("%s", "\n".join(out))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        slots_event.set()
+        wake_w.send(b"\0")
+        rx_thread.join()
+        sel.close()
+        for s in (sock, wake_r, wake_w):
+            s.close()
+        log_listener.stop()  # Queue noch ausgeben
 
-    last_rx_time = time.time()
-    no_data_reported = False
 
-    line = decode_udp_payload(data)
-    m = parse_sa_watch_line(line)
-
-    if m["measurement_valid"]:
-        print(
-            f't={m["timestamp"]:.3f}  '
-            f'X={m["x"]:.2f}  Y={m["y"]:.2f}  Z={m["z"]:.2f}  '
-            f'[{m["unit"]}]  '
-            f'(src {addr[0]}:{addr[1]})'
-        )
-    else:
-        print(
-            f't={m["timestamp"]:.3f}  INVALID  '
-            f'(src {addr[0]}:{addr[1]})  raw="{m["raw"]}"'
-        )
+if __name__ == "__main__":
+    main()
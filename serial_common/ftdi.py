@@ -0,0 +1,27 @@
+# serial_common/ftdi.py
+"""
+Gemeinsame Helfer für FTDI-USB-Seriell-Adapter (GYEMS RS-485, KVH DSP-3100).
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+
+def set_ftdi_latency_timer(port: str, latency_ms: int = 1) -> bool:
+    """
+    Setzt den FTDI latency_timer (Default 16 ms) über sysfs, nur Linux.
+    Benötigt Schreibrechte auf /sys/bus/usb-serial/devices/<tty>/latency_timer.
+    Unter Windows: Geräte-Manager -> Anschluss -> Erweitert -> Wartezeit (ms).
+    Returns: True wenn gesetzt.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    tty = os.path.basename(os.path.realpath(port))
+    path = f"/sys/bus/usb-serial/devices/{tty}/latency_timer"
+    try:
+        with open(path, "w", encoding="ascii") as f:
+            f.write(str(int(latency_ms)))
+        return True
+    except OSError:
+        return False